@@ -0,0 +1,141 @@
+"""
+Сводная статистика по базе квартир: цена, общая площадь, цена за м² и
+доля жилой площади (жилая / общая) — среднее, медиана, минимум и максимум
+по всей базе, по числу комнат и по улицам.
+
+Все показатели считаются по столбцам ApartmentTable за один проход:
+производные столбцы (цена за м², доля жилой площади) вычисляются целиком
+через map, строки группируются одной сортировкой по ключу группы, а не
+перебором списка Apartment для каждого показателя. Результат хранится до
+invalidate() — его нужно вызвать после изменения таблицы (как и
+QueryEngine.invalidate).
+
+    stats = ListingStats(table)
+    for group in stats.by_rooms():
+        print(group.key, group.count, group.price_per_m2.median)
+"""
+
+from __future__ import annotations
+
+import math
+import operator
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Sequence
+
+import profiling
+from apartment_table import ApartmentTable
+
+# Показатели GroupStats: имя поля -> подпись
+METRICS = {
+    "price": "цена, ₽",
+    "total_area": "общая площадь, м²",
+    "price_per_m2": "цена за м², ₽",
+    "living_share": "жилая / общая",
+}
+
+
+@dataclass(slots=True, frozen=True)
+class Stats:
+    count: int  # значений (строки с нулевой общей площадью не входят в отношения)
+    mean: float
+    median: float
+    min: float
+    max: float
+
+
+@dataclass(slots=True, frozen=True)
+class GroupStats:
+    key: int | str | None  # число комнат, улица; None — вся база
+    count: int
+    price: Stats
+    total_area: Stats
+    price_per_m2: Stats
+    living_share: Stats
+
+
+@dataclass(slots=True, frozen=True)
+class Summary:
+    overall: GroupStats
+    by_rooms: list[GroupStats]  # по возрастанию числа комнат
+    by_street: list[GroupStats]  # по названию улицы
+
+
+_EMPTY = Stats(0, math.nan, math.nan, math.nan, math.nan)
+
+
+def describe(values: list[float]) -> Stats:
+    """Statistics of the values; NaN values are skipped, the list is sorted in place."""
+    if any(v != v for v in values):
+        values = [v for v in values if v == v]
+    if not values:
+        return _EMPTY
+    values.sort()
+    n = len(values)
+    mid = n // 2
+    median = values[mid] if n % 2 else (values[mid - 1] + values[mid]) / 2
+    return Stats(n, math.fsum(values) / n, median, values[0], values[-1])
+
+
+def _ratio(a: int, b: int) -> float:
+    return a / b if b > 0 else math.nan
+
+
+class ListingStats:
+    """Cached aggregate statistics over the live rows of a table."""
+
+    __slots__ = ("table", "_summary")
+
+    def __init__(self, table: ApartmentTable) -> None:
+        self.table = table
+        self._summary: Summary | None = None
+
+    def invalidate(self) -> None:
+        """Drops the computed statistics; call after the table has changed."""
+        self._summary = None
+
+    def summary(self) -> Summary:
+        if self._summary is None:
+            with profiling.stage("stats"):
+                self._summary = self._compute()
+        return self._summary
+
+    def overall(self) -> GroupStats:
+        return self.summary().overall
+
+    def by_rooms(self) -> list[GroupStats]:
+        return self.summary().by_rooms
+
+    def by_street(self) -> list[GroupStats]:
+        return self.summary().by_street
+
+    def _compute(self) -> Summary:
+        t = self.table
+        rows = t.live_rows() if t.deleted else None
+
+        def live(col: Sequence[int]) -> Sequence[int]:
+            return col if rows is None else list(map(col.__getitem__, rows))
+
+        # Все столбцы выровнены по позиции живой строки
+        columns: dict[str, Sequence[float]] = {"price": live(t.price), "total_area": live(t.total_area)}
+        columns["price_per_m2"] = list(map(_ratio, columns["price"], columns["total_area"]))
+        columns["living_share"] = list(map(_ratio, live(t.living_area), columns["total_area"]))
+        n = len(columns["price"])
+
+        def group(key: int | str | None, members: Sequence[int] | None) -> GroupStats:
+            stats = {}
+            for name, col in columns.items():
+                values = list(col) if members is None else list(map(col.__getitem__, members))
+                stats[name] = describe(values)
+            return GroupStats(key, n if members is None else len(members), **stats)
+
+        def grouped(keys: Sequence[int]) -> list[tuple[int, list[int]]]:
+            order = sorted(range(n), key=keys.__getitem__)
+            return [(k, list(m)) for k, m in groupby(order, key=keys.__getitem__)]
+
+        by_rooms = [group(rooms, members) for rooms, members in grouped(live(t.rooms))]
+        by_street = [
+            group(t.streets[code], members) for code, members in grouped(live(t.street_codes))
+        ]
+        by_street.sort(key=operator.attrgetter("key"))
+        return Summary(group(None, None), by_rooms, by_street)
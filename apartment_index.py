@@ -0,0 +1,111 @@
+"""
+Вторичные индексы по ApartmentTable для задач 2 и 3.
+
+Строятся один раз после загрузки: дальше запрос по числу комнат — это
+поиск в словаре, запрос по диапазону цен — два bisect и срез, оба уже
+в нужном порядке сортировки. Стоимость запроса O(log n + k).
+
+При перезагрузке базы (reloader.py) индексы не перестраиваются:
+измененные строки удаляются и вставляются заново через bisect.
+Равные по ключу строки упорядочены по номеру строки — как и после
+устойчивой сортировки при первой загрузке.
+
+Для базы из нескольких файлов каждый шард сортируется отдельно, а общий
+порядок получается k-путевым слиянием через кучу (sort_sharded).
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+from apartment_table import ApartmentTable
+from sort_methods import sort_indices, sort_sharded
+
+# Порядок задачи 1: комнаты ↓, стоимость ↑
+ALL_ORDER = (("rooms", True), ("price", False))
+# Порядок задачи 2: этаж ↑, этажность ↑, стоимость ↓
+ROOMS_ORDER = (("floor", False), ("total_floors", False), ("price", True))
+# Порядок задачи 3: стоимость ↓, общая площадь ↑
+PRICE_ORDER = (("price", True), ("total_area", False))
+
+
+def _sorted_rows(table: ApartmentTable, order: tuple[tuple[str, bool], ...]) -> list[int]:
+    columns = [table.column(name) for name, _ in order]
+    descending = [desc for _, desc in order]
+    if len(table.shard_starts) > 1:
+        return sort_sharded(columns, descending, table.shard_rows())
+    indices = table.live_rows() if table.deleted else None
+    return sort_indices(columns, descending, indices)
+
+
+class ApartmentIndex:
+    """Room-count and price-range indexes over an ApartmentTable."""
+
+    __slots__ = ("table", "_by_rooms", "_by_price", "_neg_prices")
+
+    def __init__(self, table: ApartmentTable) -> None:
+        self.table = table
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Builds both indexes from scratch over the live rows of the table."""
+        table = self.table
+
+        # комнаты -> номера строк, уже упорядоченные по ROOMS_ORDER
+        rooms = table.rooms
+        by_rooms: dict[int, array] = {}
+        for i in _sorted_rows(table, ROOMS_ORDER):
+            rows = by_rooms.get(rooms[i])
+            if rows is None:
+                rows = by_rooms[rooms[i]] = array("q")
+            rows.append(i)
+        self._by_rooms = by_rooms
+
+        # Строки по PRICE_ORDER; цены со знаком минус идут по возрастанию — для bisect
+        self._by_price = array("q", _sorted_rows(table, PRICE_ORDER))
+        price = table.price
+        self._neg_prices = array("q", (-price[i] for i in self._by_price))
+
+    def rooms(self, rooms: int) -> array:
+        """Rows with the given room count in task 2 order."""
+        return self._by_rooms.get(rooms, array("q"))
+
+    def price_range(self, n1: int, n2: int) -> array:
+        """Rows with n1 <= price <= n2 in task 3 order."""
+        left = bisect_left(self._neg_prices, -n2)
+        right = bisect_right(self._neg_prices, -n1)
+        return self._by_price[left:right]
+
+    def ordered_by_price(self) -> array:
+        """All live rows in task 3 order (PRICE_ORDER)."""
+        return self._by_price
+
+    def _rooms_key(self, i: int) -> tuple[int, int, int, int]:
+        t = self.table
+        return t.floor[i], t.total_floors[i], -t.price[i], i
+
+    def _price_key(self, i: int) -> tuple[int, int, int]:
+        t = self.table
+        return -t.price[i], t.total_area[i], i
+
+    def add_row(self, i: int) -> None:
+        """Inserts row i (already written to the table) into both indexes."""
+        rooms = self.table.rooms[i]
+        rows = self._by_rooms.get(rooms)
+        if rows is None:
+            rows = self._by_rooms[rooms] = array("q")
+        insort(rows, i, key=self._rooms_key)
+
+        pos = bisect_left(self._by_price, self._price_key(i), key=self._price_key)
+        self._by_price.insert(pos, i)
+        self._neg_prices.insert(pos, -self.table.price[i])
+
+    def remove_row(self, i: int) -> None:
+        """Removes row i from both indexes; call before the row is overwritten."""
+        rows = self._by_rooms[self.table.rooms[i]]
+        del rows[bisect_left(rows, self._rooms_key(i), key=self._rooms_key)]
+
+        pos = bisect_left(self._by_price, self._price_key(i), key=self._price_key)
+        del self._by_price[pos]
+        del self._neg_prices[pos]
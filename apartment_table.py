@@ -0,0 +1,346 @@
+"""
+Столбцовое хранилище квартир.
+
+Числовые поля хранятся в типизированных массивах array('q'), строковые
+(улица, дом, квартира, фамилия владельца) — кодами в пулах интернированных
+строк. Объекты Apartment создаются только при выводе (row / rows).
+
+Таблица базы из нескольких файлов склеивается из таблиц шардов
+(ApartmentTable.concat) и помнит их границы: сортировки выполняются по
+каждому шарду отдельно, а затем сливаются (sort_methods.sort_sharded).
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from bisect import bisect_left
+from functools import partial
+from itertools import compress
+from typing import Iterable, Iterator, Sequence
+
+from json_reader import (
+    Address,
+    Apartment,
+    check_validation,
+    collect_records,
+    error_messages_limit,
+    iter_apartments,
+    iter_mapped_apartments,
+    map_shards,
+    shard_error,
+    shard_paths,
+)
+
+# Целочисленные столбцы таблицы (совпадают с полями Apartment)
+INT_COLUMNS = ("rooms", "total_area", "living_area", "floor", "total_floors", "price")
+# Строковые поля: поле -> (столбец кодов, пул строк)
+STRING_COLUMNS = {
+    "street": ("street_codes", "streets"),
+    "house": ("house_codes", "numbers"),
+    "apartment": ("apartment_codes", "numbers"),
+    "owner_last_name": ("owner_codes", "owners"),
+}
+
+
+class StringPool:
+    """Пул интернированных строк: каждая строка хранится один раз, в записях — ее код."""
+
+    __slots__ = ("_strings", "_codes")
+
+    def __init__(self) -> None:
+        self._strings: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def code(self, s: str) -> int:
+        c = self._codes.get(s)
+        if c is None:
+            c = len(self._strings)
+            s = sys.intern(s)
+            self._strings.append(s)
+            self._codes[s] = c
+        return c
+
+    def find(self, s: str) -> int | None:
+        """Code of s, or None if the pool does not contain it (nothing is added)."""
+        return self._codes.get(s)
+
+    @classmethod
+    def from_strings(cls, strings: list[str]) -> StringPool:
+        """Restores a pool from its strings in code order (see __iter__)."""
+        pool = cls()
+        for s in strings:
+            pool.code(s)
+        return pool
+
+    def __getitem__(self, code: int) -> str:
+        return self._strings[code]
+
+    def strings_from(self, code: int) -> list[str]:
+        """Strings with codes >= code, in code order (added after that point)."""
+        return self._strings[code:]
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._strings)
+
+
+class ApartmentTable:
+    """
+    Columnar store of apartments. Row i is described by the i-th element of
+    every column; filters return lists of row indices, rows() turns indices
+    back into Apartment objects.
+    """
+
+    __slots__ = (
+        *INT_COLUMNS,
+        "street_codes",
+        "house_codes",
+        "apartment_codes",
+        "owner_codes",
+        "streets",
+        "owners",
+        "numbers",
+        "deleted",
+        "shard_starts",
+    )
+
+    def __init__(self) -> None:
+        self.rooms = array("q")
+        self.total_area = array("q")
+        self.living_area = array("q")
+        self.floor = array("q")
+        self.total_floors = array("q")
+        self.price = array("q")
+        self.street_codes = array("I")
+        self.house_codes = array("I")
+        self.apartment_codes = array("I")
+        self.owner_codes = array("I")
+        self.streets = StringPool()
+        self.owners = StringPool()
+        self.numbers = StringPool()  # номера домов и квартир
+        self.deleted: set[int] = set()  # удаленные строки (номера остальных не меняются)
+        self.shard_starts: list[int] = [0]  # первая строка каждого шарда
+
+    @classmethod
+    def concat(cls, tables: Iterable[ApartmentTable]) -> ApartmentTable:
+        """One table of the given tables in order; each of them becomes a shard."""
+        table = cls()
+        table.shard_starts = []
+        for t in tables:
+            offset = len(table)
+            for name in INT_COLUMNS:
+                table.column(name).extend(t.column(name))
+            for codes, pool, src_codes, src_pool in (
+                (table.street_codes, table.streets, t.street_codes, t.streets),
+                (table.house_codes, table.numbers, t.house_codes, t.numbers),
+                (table.apartment_codes, table.numbers, t.apartment_codes, t.numbers),
+                (table.owner_codes, table.owners, t.owner_codes, t.owners),
+            ):
+                remap = [pool.code(s) for s in src_pool]
+                codes.extend(array("I", map(remap.__getitem__, src_codes)))
+            table.deleted.update(offset + i for i in t.deleted)
+            table.shard_starts.append(offset)
+        if not table.shard_starts:
+            table.shard_starts = [0]
+        return table
+
+    @classmethod
+    def from_apartments(cls, apartments: Iterable[Apartment]) -> ApartmentTable:
+        table = cls()
+        table.extend(apartments)
+        return table
+
+    def append(self, a: Apartment) -> None:
+        self.rooms.append(a.rooms)
+        self.total_area.append(a.total_area)
+        self.living_area.append(a.living_area)
+        self.floor.append(a.floor)
+        self.total_floors.append(a.total_floors)
+        self.price.append(a.price)
+        self.street_codes.append(self.streets.code(a.address.street))
+        self.house_codes.append(self.numbers.code(a.address.house))
+        self.apartment_codes.append(self.numbers.code(a.address.apartment))
+        self.owner_codes.append(self.owners.code(a.owner_last_name))
+
+    def extend(self, apartments: Iterable[Apartment]) -> None:
+        for a in apartments:
+            self.append(a)
+
+    def set_row(self, i: int, a: Apartment) -> None:
+        """Overwrites row i in place."""
+        self.rooms[i] = a.rooms
+        self.total_area[i] = a.total_area
+        self.living_area[i] = a.living_area
+        self.floor[i] = a.floor
+        self.total_floors[i] = a.total_floors
+        self.price[i] = a.price
+        self.street_codes[i] = self.streets.code(a.address.street)
+        self.house_codes[i] = self.numbers.code(a.address.house)
+        self.apartment_codes[i] = self.numbers.code(a.address.apartment)
+        self.owner_codes[i] = self.owners.code(a.owner_last_name)
+
+    def delete_row(self, i: int) -> None:
+        """Marks row i as deleted; it stays in the columns but leaves live_rows()."""
+        self.deleted.add(i)
+
+    def compact(self) -> array:
+        """
+        Drops the deleted rows and the strings no live row refers to, in place.
+        Live rows keep their relative order. Returns old row -> new row
+        (-1 for deleted rows); row numbers held elsewhere must be remapped.
+        """
+        live = self.live_rows()
+        remap = array("q", [-1]) * len(self)
+        for new, old in enumerate(live):
+            remap[old] = new
+
+        for name in INT_COLUMNS:
+            col = self.column(name)
+            col[:] = array("q", map(col.__getitem__, live))
+
+        # Пулы собираются заново: коды строк, на которые ссылались только
+        # удаленные или перезаписанные строки, пропадают
+        pools: dict[str, StringPool] = {}
+        for codes_name, pool_name in STRING_COLUMNS.values():
+            codes, pool = getattr(self, codes_name), getattr(self, pool_name)
+            new_pool = pools.setdefault(pool_name, StringPool())
+            codes[:] = array("I", (new_pool.code(pool[codes[i]]) for i in live))
+        for pool_name, pool in pools.items():
+            setattr(self, pool_name, pool)
+
+        # Граница шарда — первая живая строка не раньше старой границы
+        self.shard_starts = [bisect_left(live, start) for start in self.shard_starts]
+        self.deleted = set()
+        return remap
+
+    def __len__(self) -> int:
+        """Number of physical rows (including deleted ones)."""
+        return len(self.price)
+
+    def live_count(self) -> int:
+        return len(self.price) - len(self.deleted)
+
+    def live_rows(self) -> list[int]:
+        if not self.deleted:
+            return list(range(len(self)))
+        deleted = self.deleted
+        return [i for i in range(len(self)) if i not in deleted]
+
+    def shard_rows(self) -> list[Sequence[int]]:
+        """Live rows of every shard; rows appended later belong to the last one."""
+        ends = [*self.shard_starts[1:], len(self)]
+        shards = [range(start, end) for start, end in zip(self.shard_starts, ends)]
+        if not self.deleted:
+            return shards
+        deleted = self.deleted
+        return [[i for i in r if i not in deleted] for r in shards]
+
+    def column(self, name: str) -> array:
+        if name not in INT_COLUMNS:
+            raise KeyError(f"неизвестный столбец: {name}")
+        return getattr(self, name)
+
+    def string_column(self, name: str) -> tuple[array, StringPool]:
+        """Codes column and string pool of a string field (see STRING_COLUMNS)."""
+        if name not in STRING_COLUMNS:
+            raise KeyError(f"неизвестный столбец: {name}")
+        codes, pool = STRING_COLUMNS[name]
+        return getattr(self, codes), getattr(self, pool)
+
+    def row(self, i: int) -> Apartment:
+        """Materializes row i as an Apartment."""
+        return Apartment(
+            address=Address(
+                street=self.streets[self.street_codes[i]],
+                house=self.numbers[self.house_codes[i]],
+                apartment=self.numbers[self.apartment_codes[i]],
+            ),
+            rooms=self.rooms[i],
+            total_area=self.total_area[i],
+            living_area=self.living_area[i],
+            floor=self.floor[i],
+            total_floors=self.total_floors[i],
+            owner_last_name=self.owners[self.owner_codes[i]],
+            price=self.price[i],
+        )
+
+    def rows(self, indices: Iterable[int] | None = None) -> Iterator[Apartment]:
+        """Lazily materializes the given rows (all live rows by default)."""
+        if indices is None:
+            indices = self.live_rows()
+        return map(self.row, indices)
+
+    def indices_equal(self, name: str, value: int) -> list[int]:
+        """Indices of rows where column == value."""
+        col = self.column(name)
+        rows = list(compress(range(len(col)), map(value.__eq__, col)))
+        return self.drop_deleted(rows)
+
+    def indices_between(self, name: str, lo: int, hi: int) -> list[int]:
+        """Indices of rows where lo <= column <= hi."""
+        col = self.column(name)
+        rows = [i for i in compress(range(len(col)), map(lo.__le__, col)) if col[i] <= hi]
+        return self.drop_deleted(rows)
+
+    def drop_deleted(self, rows: list[int]) -> list[int]:
+        """Filters the deleted rows out of `rows`."""
+        if not self.deleted:
+            return rows
+        deleted = self.deleted
+        return [i for i in rows if i not in deleted]
+
+
+def read_apartment_table(
+    json_path: str, workers: int | None = None, validation: str = "full", mapped: bool = False
+) -> tuple[ApartmentTable, int, list[str]]:
+    """
+    Same contract as read_apartments, but records are streamed straight into
+    an ApartmentTable, so the full list of Apartment objects is never built.
+    The file is read in chunks (iter_apartments); mapped=True reads it
+    through mmap instead (iter_mapped_apartments), for files that are never
+    rewritten in place while they load.
+    workers > 1 validates records in a process pool (see iter_apartments).
+    json_path may be a directory or a glob of shards (see read_apartments).
+    validation — level of record checks (json_reader.VALIDATION_LEVELS).
+    Returns: (table, invalid_count, error_messages)
+    """
+    check_validation(validation)
+    paths = shard_paths(json_path)
+    if paths != [json_path]:
+        read_shard = partial(read_apartment_table, validation=validation, mapped=mapped)
+        return concat_shards(json_path, paths, map_shards(read_shard, paths, workers))
+
+    if mapped:
+        records = iter_mapped_apartments(json_path, workers, validation)
+    else:
+        records = iter_apartments(json_path, workers=workers, validation=validation)
+    table = ApartmentTable()
+    collected = collect_records(records, table.append, error_messages_limit(validation))
+    if isinstance(collected, str):
+        # Ошибка уровня файла: как и read_apartments, не отдаем частичные данные
+        return ApartmentTable(), 0, [collected]
+    invalid_count, error_messages = collected
+    return table, invalid_count, error_messages
+
+
+def concat_shards(
+    source: str,
+    paths: list[str],
+    results: list[tuple[ApartmentTable, int, list[str]]],
+) -> tuple[ApartmentTable, int, list[str]]:
+    """
+    Joins the (table, invalid_count, error_messages) results of the shard
+    files into one result; error messages get the file name prefix.
+    """
+    if not paths:
+        return ApartmentTable(), 0, [f"Ошибка чтения файла: нет файлов базы по пути {source!r}"]
+
+    invalid_count = 0
+    error_messages: list[str] = []
+    for path, (_, invalid, errors) in zip(paths, results):
+        invalid_count += invalid
+        error_messages.extend(shard_error(path, e) for e in errors)
+    return ApartmentTable.concat(t for t, _, _ in results), invalid_count, error_messages
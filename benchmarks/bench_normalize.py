@@ -0,0 +1,181 @@
+"""
+Бенчмарк нормализации: удаление комментариев JSONC и разбор числовых полей.
+Сравнивает посимвольные реализации (как они были до перехода на regex)
+с текущими функциями json_reader и проверяет, что результаты совпадают.
+
+Запуск:
+    python benchmarks/bench_normalize.py [--records 100000] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import json_reader  # noqa: E402
+
+
+# ---------------------------------------------------------------------------
+# Прежние реализации (эталон для сравнения)
+# ---------------------------------------------------------------------------
+
+def legacy_digits_to_int(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    s = str(value)
+    out = 0
+    has_digit = False
+    for ch in s:
+        o = ord(ch) - 48
+        if 0 <= o <= 9:
+            has_digit = True
+            out = out * 10 + o
+    return out if has_digit else 0
+
+
+def legacy_strip_json_comments(text: str) -> str:
+    n = len(text)
+    i = 0
+    res: list[str] = []
+    in_str = False
+    esc = False
+
+    while i < n:
+        ch = text[i]
+        if in_str:
+            res.append(ch)
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+            i += 1
+            continue
+
+        if ch == '"':
+            in_str = True
+            res.append(ch)
+            i += 1
+            continue
+
+        if ch == "/" and i + 1 < n and text[i + 1] == "/":
+            i += 2
+            while i < n and text[i] not in "\r\n":
+                i += 1
+            continue
+
+        if ch == "/" and i + 1 < n and text[i + 1] == "*":
+            i += 2
+            while i + 1 < n and not (text[i] == "*" and text[i + 1] == "/"):
+                i += 1
+            i = i + 2 if i + 1 < n else n
+            continue
+
+        res.append(ch)
+        i += 1
+
+    return "".join(res)
+
+
+def legacy_has_negative_value(value: Any) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, (int, float)):
+        return value < 0
+    s = str(value).strip()
+    if "-" in s:
+        parts = s.replace("-", " -").split()
+        for part in parts:
+            if part.startswith("-") and len(part) > 1:
+                try:
+                    float(part)
+                    return True
+                except ValueError:
+                    pass
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Данные и замеры
+# ---------------------------------------------------------------------------
+
+def _make_feed(records: int) -> str:
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "aprtment.json")
+    with open(path, "r", encoding="utf-8") as f:
+        base = json.loads(legacy_strip_json_comments(f.read()))["apartments"]
+    lines = []
+    for i in range(records):
+        rec = json.dumps(base[i % len(base)], ensure_ascii=False)
+        lines.append(f"    // запись {i + 1}\n    {rec}" if i % 10 == 0 else f"    /* {i + 1} */ {rec}")
+    return '{\n  "apartments": [\n' + ",\n".join(lines) + "\n  ]\n}\n"
+
+
+def _best_of(repeat: int, fn: Callable[[], Any]) -> tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def _report(name: str, old: float, new: float) -> None:
+    print(f"{name:<34} {old * 1000:>10.1f} мс {new * 1000:>10.1f} мс {old / new:>8.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = _make_feed(args.records)
+    items = json.loads(legacy_strip_json_comments(text))["apartments"]
+    print(f"Записей: {args.records}, размер текста: {len(text) / 1e6:.1f} млн символов\n")
+    print(f"{'Операция':<34} {'было':>13} {'стало':>13} {'ускорение':>9}")
+
+    t_old, r_old = _best_of(args.repeat, lambda: legacy_strip_json_comments(text))
+    t_new, r_new = _best_of(args.repeat, lambda: json_reader._strip_json_comments(text))
+    assert r_old == r_new, "результаты удаления комментариев различаются"
+    _report("удаление комментариев", t_old, t_new)
+
+    def stream_strip() -> str:
+        stripper = json_reader._CommentStripper()
+        step = json_reader.STREAM_CHUNK_SIZE
+        parts = [stripper.feed(text[i:i + step]) for i in range(0, len(text), step)]
+        parts.append(stripper.feed("", final=True))
+        return "".join(parts)
+
+    t_new, r_new = _best_of(args.repeat, stream_strip)
+    assert r_old == r_new, "результаты потокового удаления комментариев различаются"
+    _report("удаление комментариев (поток)", t_old, t_new)
+
+    for key in ("price", "total_area", "floor"):
+        column = [item[key] for item in items]
+        t_old, r_old = _best_of(args.repeat, lambda: [legacy_digits_to_int(v) for v in column])
+        t_new, r_new = _best_of(args.repeat, lambda: json_reader._digits_to_int_column(column))
+        assert r_old == r_new, f"результаты разбора '{key}' различаются"
+        _report(f"разбор чисел: {key}", t_old, t_new)
+
+        t_old, r_old = _best_of(args.repeat, lambda: [legacy_has_negative_value(v) for v in column])
+        t_new, r_new = _best_of(args.repeat, lambda: json_reader._has_negative_column(column))
+        assert r_old == r_new, f"результаты проверки знака '{key}' различаются"
+        _report(f"проверка знака: {key}", t_old, t_new)
+
+    print("\nРезультаты совпадают.")
+
+
+if __name__ == "__main__":
+    main()
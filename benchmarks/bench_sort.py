@@ -0,0 +1,98 @@
+"""
+Бенчмарк сортировки: прежняя схема (кортежи (key, item) + сортировка Шелла
+с шагом n/2) против упакованных целочисленных ключей с разными
+последовательностями шагов, adaptive_sort, поразрядной сортировкой и sorted().
+Ключ — задача 1: комнаты ↓ + стоимость ↑.
+
+Запуск:
+    python benchmarks/bench_sort.py [--sizes 1000 10000 50000] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import sort_methods  # noqa: E402
+
+
+def legacy_shell_sort(list: list) -> list:
+    """Сортировка Шелла в прежнем виде: шаг n/2, обмен элементов."""
+    last_index = len(list)
+    step = len(list) // 2
+    while step > 0:
+        for i in range(step, last_index, 1):
+            j = i
+            delta = j - step
+            while delta >= 0 and list[delta] > list[j]:
+                list[delta], list[j] = list[j], list[delta]
+                j = delta
+                delta = j - step
+        step //= 2
+    return list
+
+
+def legacy_sorted(rooms: array, price: array) -> list[int]:
+    # Вторым элементом кортежа берется номер строки: с Apartment при
+    # равных ключах прежняя схема падала бы на сравнении объектов.
+    decorated = [((-rooms[i], price[i]), i) for i in range(len(rooms))]
+    legacy_shell_sort(decorated)
+    return [i for _, i in decorated]
+
+
+def _best_of(repeat: int, fn: Callable[[], Any]) -> tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    variants: list[tuple[str, str, str]] = [
+        ("shell/ciura", "shell", "ciura"),
+        ("shell/tokuda", "shell", "tokuda"),
+        ("shell/halving", "shell", "halving"),
+        ("adaptive", "adaptive", "ciura"),
+        ("radix", "radix", "ciura"),
+        ("builtin sorted", "builtin", "ciura"),
+    ]
+
+    print(f"{'n':>8} {'вариант':<24} {'время':>12} {'ускорение':>10}")
+    for n in args.sizes:
+        rooms = array("q", (rnd.randint(1, 5) for _ in range(n)))
+        price = array("q", (rnd.randrange(2_000_000, 20_000_000, 50_000) for _ in range(n)))
+
+        t_old, expected = _best_of(args.repeat, lambda: legacy_sorted(rooms, price))
+        print(f"{n:>8} {'прежний (кортежи, n/2)':<24} {t_old * 1000:>9.1f} мс {1.0:>9.1f}x")
+
+        for name, method, gaps in variants:
+            t_new, result = _best_of(
+                args.repeat,
+                lambda: sort_methods.sort_indices([rooms, price], [True, False], None, method, gaps),
+            )
+            # Прежняя схема неустойчива, поэтому сравниваются ключи, а не номера строк
+            assert [(-rooms[i], price[i]) for i in result] == [(-rooms[i], price[i]) for i in expected]
+            assert result == sorted(range(n), key=lambda i: (-rooms[i], price[i])), "порядок неустойчив"
+            print(f"{n:>8} {name:<24} {t_new * 1000:>9.1f} мс {t_old / t_new:>9.1f}x")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Генератор синтетической базы квартир в формате aprtment.json.
+
+Значения записываются в тех же «грязных» строковых форматах, что и в
+реальной базе ("6 700 000 рублей", "56 м²"), между записями вставляются
+комментарии JSONC, заданная доля записей делается некорректной.
+Файл пишется потоково, поэтому можно генерировать 10^7 записей.
+
+Запуск:
+    python benchmarks/generate_dataset.py out.json --records 1000000 [--invalid 0.05]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from typing import Any, TextIO
+
+STREETS = (
+    "улица Ленина", "улица Пушкина", "улица Гагарина", "Советская улица",
+    "улица Кирова", "Центральная улица", "Парковая улица", "Речная улица",
+    "Зелёная улица", "Молодёжная улица", "Садовая улица", "Школьная улица",
+    "проспект Мира", "Набережная улица", "улица Чехова", "Лесная улица",
+)
+OWNERS = (
+    "Ильин", "Орлов", "Сергеев", "Крылов", "Васильев", "Антонов", "Емельянов",
+    "Тихонов", "Соболев", "Иванов", "Смирнов", "Кузнецов", "Попов", "Лебедев",
+    "Козлов", "Новиков", "Морозов", "Петров", "Волков", "Соловьёв",
+)
+
+
+def _price_text(rnd: random.Random, price: int) -> Any:
+    style = rnd.random()
+    if style < 0.7:
+        return f"{price:,} рублей".replace(",", " ")
+    if style < 0.85:
+        return f"{price:,} руб.".replace(",", " ")
+    if style < 0.95:
+        return str(price)
+    return price
+
+
+def _area_text(rnd: random.Random, area: int) -> Any:
+    style = rnd.random()
+    if style < 0.8:
+        return f"{area} м²"
+    if style < 0.95:
+        return str(area)
+    return area
+
+
+def make_record(rnd: random.Random) -> dict[str, Any]:
+    """One valid record with realistic values."""
+    rooms = rnd.choices((1, 2, 3, 4, 5), weights=(30, 35, 22, 10, 3))[0]
+    total_area = rnd.randint(18 + rooms * 12, 30 + rooms * 20)
+    living_area = max(10, int(total_area * rnd.uniform(0.5, 0.7)))
+    total_floors = rnd.choice((4, 5, 9, 10, 12, 14, 16, 17, 25))
+    floor = rnd.randint(1, total_floors)
+    price = rnd.randrange(25, 60) * 2_000 * total_area // 1_000 * 1_000
+    return {
+        "address": {
+            "street": rnd.choice(STREETS),
+            "house": str(rnd.randint(1, 120)),
+            "apartment": str(rnd.randint(1, 400)),
+        },
+        "rooms": str(rooms),
+        "total_area": _area_text(rnd, total_area),
+        "living_area": _area_text(rnd, living_area),
+        "floor": str(floor),
+        "total_floors": str(total_floors),
+        "owner_last_name": rnd.choice(OWNERS),
+        "price": _price_text(rnd, price),
+    }
+
+
+def spoil_record(rnd: random.Random, rec: dict[str, Any]) -> Any:
+    """Makes a record invalid in one of the ways seen in real feeds."""
+    kind = rnd.randrange(8)
+    if kind == 0:
+        rec["floor"] = f"-{rec['floor']}"
+    elif kind == 1:
+        rec["floor"] = str(int(rec["total_floors"]) + rnd.randint(1, 5))
+    elif kind == 2:
+        del rec["address"]["house"]
+    elif kind == 3:
+        rec["owner_last_name"] = ""
+    elif kind == 4:
+        rec["price"] = "0 рублей"
+    elif kind == 5:
+        rec["address"] = "не указан"
+    elif kind == 6:
+        rec["rooms"] = None
+    else:
+        return "не запись"
+    return rec
+
+
+def write_feed(
+    f: TextIO,
+    records: int,
+    invalid_share: float = 0.05,
+    comment_every: int = 10,
+    seed: int = 1,
+) -> int:
+    """Writes a JSONC feed; returns the number of invalid records written."""
+    rnd = random.Random(seed)
+    invalid = 0
+    f.write("// Синтетическая база квартир (benchmarks/generate_dataset.py)\n")
+    f.write('{\n  "apartments": [\n')
+    for i in range(records):
+        rec: Any = make_record(rnd)
+        if rnd.random() < invalid_share:
+            rec = spoil_record(rnd, rec)
+            invalid += 1
+        if comment_every and i % comment_every == 0:
+            f.write(f"    // запись {i + 1}\n")
+        f.write("    ")
+        f.write(json.dumps(rec, ensure_ascii=False))
+        f.write(",\n" if i + 1 < records else "\n")
+    f.write("  ] /* конец списка */\n}\n")
+    return invalid
+
+
+def generate_feed(path: str, records: int, invalid_share: float = 0.05, seed: int = 1) -> int:
+    with open(path, "w", encoding="utf-8") as f:
+        return write_feed(f, records, invalid_share, seed=seed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="куда записать файл")
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--invalid", type=float, default=0.05, help="доля некорректных записей")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    invalid = generate_feed(args.path, args.records, args.invalid, args.seed)
+    print(f"{args.path}: {args.records} записей, некорректных: {invalid}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Набор бенчмарков: загрузка, сортировки и три запроса index.main на
+синтетических базах разного размера.
+
+Для каждого размера генерируется база (generate_dataset.py), затем
+замеряются этапы; время — лучшее из --repeat запусков, пиковая память —
+отдельным запуском под tracemalloc (куча Python). Результаты сохраняются
+в JSON, чтобы сравнивать запуски между собой.
+
+Запуск:
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000 --output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, TextIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import index  # noqa: E402
+import sort_methods  # noqa: E402
+from apartment_index import ApartmentIndex  # noqa: E402
+from apartment_table import read_apartment_table  # noqa: E402
+from generate_dataset import generate_feed  # noqa: E402
+from json_reader import read_apartments  # noqa: E402
+from query_engine import Query, QueryEngine, task_price, task_rooms  # noqa: E402
+
+QUERIES_PER_RUN = 100  # запросов задач 2 и 3 в одном замере
+
+
+def _measure(fn: Callable[[], Any], repeat: int, memory: bool) -> tuple[float, float | None]:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+    return best, peak_mb
+
+
+def _stages(path: str, n: int, args: argparse.Namespace) -> list[tuple[str, Callable[[], Any]]]:
+    """Stage name and callable; data for the query stages is loaded once here."""
+    table, _, _ = read_apartment_table(path)
+    apt_index = ApartmentIndex(table)
+    rnd = random.Random(args.seed)
+    rooms_queries = [rnd.randint(1, 5) for _ in range(QUERIES_PER_RUN)]
+    price_queries = [
+        sorted(rnd.randrange(2_000_000, 20_000_000, 100_000) for _ in range(2))
+        for _ in range(QUERIES_PER_RUN)
+    ]
+    prices = list(table.price)
+
+    def shell(gaps: str) -> Callable[[], Any]:
+        return lambda: sort_methods.shell_sort(prices[:], gaps)
+
+    def bubble() -> None:
+        sort_methods.bubble_sort(prices[:args.bubble_max])
+
+    engine = QueryEngine(table, apt_index)
+
+    def show(query: Query, out: TextIO) -> None:
+        # Как пункты 2 и 3 меню: план и выполнение запроса, записи строк и вывод таблицы
+        rows = engine.run(query)
+        index._print_apartments("", table.rows(rows), out)
+
+    def task2() -> None:
+        with open(os.devnull, "w", encoding="utf-8") as out:
+            for r in rooms_queries:
+                show(task_rooms(r), out)
+
+    def task3() -> None:
+        with open(os.devnull, "w", encoding="utf-8") as out:
+            for n1, n2 in price_queries:
+                show(task_price(n1, n2), out)
+
+    stages: list[tuple[str, Callable[[], Any]]] = [
+        ("read_apartments", lambda: read_apartments(path)),
+        ("read_apartments(stream)", lambda: read_apartments(path, stream=True)),
+        ("read_apartment_table", lambda: read_apartment_table(path)),
+        ("shell_sort(ciura)", shell("ciura")),
+        ("shell_sort(halving)", shell("halving")),
+    ]
+    if n <= args.bubble_max:
+        stages.append(("bubble_sort", bubble))
+    stages += [
+        ("task1 full sort", lambda: index.sort_all_rows(table)),
+        ("task1 first page", lambda: index.sort_all_rows(table, lazy=True)[:50]),
+        ("index build", lambda: ApartmentIndex(table)),
+        (f"task2 x{QUERIES_PER_RUN}", task2),
+        (f"task3 x{QUERIES_PER_RUN}", task3),
+    ]
+    return stages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--invalid", type=float, default=0.05, help="доля некорректных записей")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--bubble-max", type=int, default=2_000, help="bubble_sort только до N записей")
+    parser.add_argument("--no-memory", action="store_true", help="не замерять пиковую память")
+    parser.add_argument("--only", nargs="+", metavar="STAGE", help="только этапы с такими префиксами")
+    parser.add_argument("--output", default="bench_results.json", help="файл результатов JSON")
+    args = parser.parse_args()
+
+    results: list[dict[str, Any]] = []
+    print(f"{'записей':>10} {'этап':<26} {'время, с':>10} {'пик, МБ':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = os.path.join(tmp, f"feed_{n}.json")
+            invalid = generate_feed(path, n, args.invalid, args.seed)
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{n:>10} {'(файл)':<26} {size_mb:>8.1f}МБ {'':>9}  некорректных: {invalid}")
+
+            for name, fn in _stages(path, n, args):
+                if args.only and not any(name.startswith(p) for p in args.only):
+                    continue
+                seconds, peak_mb = _measure(fn, args.repeat, not args.no_memory)
+                peak_text = f"{peak_mb:>9.1f}" if peak_mb is not None else f"{'-':>9}"
+                print(f"{n:>10} {name:<26} {seconds:>10.4f} {peak_text}")
+                results.append({
+                    "records": n,
+                    "file_mb": round(size_mb, 3),
+                    "stage": name,
+                    "seconds": seconds,
+                    "peak_mb": peak_mb,
+                })
+            os.remove(path)
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
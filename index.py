@@ -21,13 +21,36 @@
 
 from __future__ import annotations
 
-from typing import Iterable
-from json_reader import Apartment, read_apartments
-from sort_methods import shell_sort
+import argparse
+import contextlib
+import csv
+import json
+import math
+import os
+import sys
+from typing import Iterable, Sequence, TextIO
+from aggregates import METRICS, GroupStats, ListingStats
+from apartment_index import ApartmentIndex
+from apartment_table import ApartmentTable
+from json_reader import VALIDATION_LEVELS, Apartment
+from listing_cache import load_cached_table
+from listing_export import (
+    EXPORT_SUFFIXES,
+    RECORD_FIELDS,
+    export_apartments,
+    is_export_path,
+    read_export_table,
+    record_fields,
+)
+import profiling
+from query_engine import PRESETS, QueryEngine, task_all, task_price, task_rooms
+from reloader import Reloader, ReloadResult, file_signature
 
 
 def _format_price_rub(price: int) -> str:
     # 6500000 -> "6 500 000 ₽"
+    if price >= 0:
+        return f"{price:,}".replace(",", " ") + " ₽"
     s = str(price)
     parts: list[str] = []
     i = len(s)
@@ -40,113 +63,502 @@ def _format_price_rub(price: int) -> str:
     return " ".join(reversed(parts)) + " ₽"
 
 
-def _print_apartments(title: str, items: Iterable[Apartment]) -> None:
-    print("\n" + title)
-    print("=" * 120)
-    
-    # Заголовок таблицы
-    header = "|| УЛИЦА || ДОМ || КВАРТИРА || КОМНАТЫ || ПЛОЩАДЬ ОБЩ. || ПЛОЩАДЬ ЖИЛ. || ЭТАЖ || ВЛАДЕЛЕЦ || ЦЕНА ||"
-    print(header)
-    print("=" * 120)
-    
-    # Преобразуем в список для проверки на пустоту
-    items_list = list(items)
-    
-    if not items_list:
-        print("||" + " " * 116 + "||")
-        print("||" + " " * 40 + "Нет данных для отображения" + " " * 50 + "||")
-        print("||" + " " * 116 + "||")
-    else:
-        # Строки таблицы
-        for a in items_list:
-            try:
-                # Форматируем каждое поле с выравниванием
-                street = (a.address.street[:20] if a.address.street else "").ljust(20)
-                house = str(a.address.house if a.address.house else "").rjust(3)
-                apartment = str(a.address.apartment if a.address.apartment else "").rjust(3)
-                rooms = str(a.rooms if a.rooms else 0).rjust(3)
-                total_area = f"{a.total_area if a.total_area else 0} м²".rjust(10)
-                living_area = f"{a.living_area if a.living_area else 0} м²".rjust(10)
-                floor = f"{a.floor if a.floor else 0}/{a.total_floors if a.total_floors else 0}".rjust(8)
-                owner = (a.owner_last_name[:12] if a.owner_last_name else "").ljust(12)
-                price = _format_price_rub(a.price if a.price else 0).rjust(15)
-                
-                row = f"|| {street} || {house} || {apartment} || {rooms} || {total_area} || {living_area} || {floor} || {owner} || {price} ||"
-                print(row)
-            except Exception as e:
-                print(f"|| Ошибка при выводе записи: {e}" + " " * (116 - len(str(e))) + "||")
-                continue
-    
-    print("=" * 120)
-
-
-def _shell_sorted(items: list[Apartment], key_fn) -> list[Apartment]:
+TABLE_WIDTH = 120
+RENDER_BLOCK_ROWS = 2048  # строк в одном вызове write
+_CELL_CACHE_LIMIT = 1 << 16
+
+_TABLE_RULE = "=" * TABLE_WIDTH
+_TABLE_HEADER = "|| УЛИЦА || ДОМ || КВАРТИРА || КОМНАТЫ || ПЛОЩАДЬ ОБЩ. || ПЛОЩАДЬ ЖИЛ. || ЭТАЖ || ВЛАДЕЛЕЦ || ЦЕНА ||"
+_TABLE_EMPTY = "\n".join([
+    "||" + " " * 116 + "||",
+    "||" + " " * 40 + "Нет данных для отображения" + " " * 50 + "||",
+    "||" + " " * 116 + "||",
+])
+
+# Готовые ячейки цены и площади: значения в базе сильно повторяются
+_price_cells: dict[int, str] = {}
+_area_cells: dict[int, str] = {}
+
+
+def _price_cell(price: int) -> str:
+    cell = _price_cells.get(price)
+    if cell is None:
+        if len(_price_cells) >= _CELL_CACHE_LIMIT:
+            _price_cells.clear()
+        cell = _price_cells[price] = _format_price_rub(price).rjust(15)
+    return cell
+
+
+def _area_cell(area: int) -> str:
+    cell = _area_cells.get(area)
+    if cell is None:
+        if len(_area_cells) >= _CELL_CACHE_LIMIT:
+            _area_cells.clear()
+        cell = _area_cells[area] = f"{area} м²".rjust(10)
+    return cell
+
+
+def _format_row(a: Apartment) -> str:
+    addr = a.address
+    floor = f"{a.floor}/{a.total_floors}"
+    return (
+        f"|| {addr.street[:20]:<20} || {addr.house:>3} || {addr.apartment:>3} || {a.rooms:>3} || "
+        f"{_area_cell(a.total_area)} || {_area_cell(a.living_area)} || {floor:>8} || "
+        f"{a.owner_last_name[:12]:<12} || {_price_cell(a.price)} ||"
+    )
+
+
+def _print_apartments(
+    title: str,
+    items: Iterable[Apartment],
+    out: TextIO | None = None,
+    limit: int | None = None,
+) -> int:
     """
-    Сортировка Шелла по составному ключу (кортежу).
-    Реализовано через декорирование: (key, item) -> shell_sort -> item.
+    Выводит таблицу квартир. Строки форматируются в буфер и пишутся блоками
+    по RENDER_BLOCK_ROWS; items читается лениво, поэтому при limit
+    форматируются только первые limit записей.
+    Возвращает число выведенных строк.
+    """
+    with profiling.stage("render"):
+        shown = _write_table(title, items, out if out is not None else sys.stdout, limit)
+    profiling.count("render.rows", shown)
+    return shown
+
+
+def _write_table(title: str, items: Iterable[Apartment], out: TextIO, limit: int | None) -> int:
+    out.write(f"\n{title}\n{_TABLE_RULE}\n{_TABLE_HEADER}\n{_TABLE_RULE}\n")
+
+    shown = 0
+    truncated = False
+    block: list[str] = []
+    for a in items:
+        if shown == limit:
+            truncated = True
+            break
+        block.append(_format_row(a))
+        shown += 1
+        if len(block) == RENDER_BLOCK_ROWS:
+            block.append("")
+            out.write("\n".join(block))
+            block.clear()
+    if block:
+        block.append("")
+        out.write("\n".join(block))
+
+    if not shown:
+        out.write(_TABLE_EMPTY + "\n")
+    elif truncated:
+        out.write(f"|| ... показаны первые {shown} записей".ljust(TABLE_WIDTH - 2) + "||\n")
+    out.write(_TABLE_RULE + "\n")
+    return shown
+
+
+def _stat_price(value: float) -> str:
+    return "—" if math.isnan(value) else _format_price_rub(round(value))
+
+
+def _stat_share(value: float) -> str:
+    return "—" if math.isnan(value) else f"{value:.3f}"
+
+
+def _stat_area(value: float) -> str:
+    return "—" if math.isnan(value) else f"{value:.1f} м²"
+
+
+_STAT_FORMATS = {
+    "price": _stat_price,
+    "total_area": _stat_area,
+    "price_per_m2": _stat_price,
+    "living_share": _stat_share,
+}
+# Столбцы таблиц по группам: (заголовок, ширина); вместе ровно TABLE_WIDTH
+_STAT_COLUMNS = (
+    ("КВАРТИР", 7), ("ЦЕНА СРЕДН.", 15), ("ЦЕНА МЕДИАНА", 15),
+    ("₽/м² СРЕДН.", 12), ("₽/м² МЕДИАНА", 12), ("ЖИЛ./ОБЩ.", 9),
+)
+
+
+def _stat_row(label: str, g: GroupStats) -> str:
+    cells = (
+        str(g.count), _stat_price(g.price.mean), _stat_price(g.price.median),
+        _stat_price(g.price_per_m2.mean), _stat_price(g.price_per_m2.median),
+        _stat_share(g.living_share.mean),
+    )
+    body = " || ".join(c.rjust(w) for c, (_, w) in zip(cells, _STAT_COLUMNS))
+    return f"|| {label[:20]:<20} || {body} ||"
+
+
+def _print_stats(stats: ListingStats, out: TextIO | None = None) -> None:
+    """Выводит сводную статистику: по всей базе, по числу комнат и по улицам."""
+    out = out if out is not None else sys.stdout
+    summary = stats.summary()
+    overall = summary.overall
+    lines = [f"\n4) Статистика по базе (квартир: {overall.count})", _TABLE_RULE]
+    for name, label in METRICS.items():
+        s = getattr(overall, name)
+        fmt = _STAT_FORMATS[name]
+        lines.append(
+            f"  {label:<20} средняя {fmt(s.mean)}, медиана {fmt(s.median)}, "
+            f"мин {fmt(s.min)}, макс {fmt(s.max)}"
+        )
+    for title, groups in (
+        ("КОМНАТ", [(f"{g.key} комн.", g) for g in summary.by_rooms]),
+        ("УЛИЦА", [(str(g.key), g) for g in summary.by_street]),
+    ):
+        header = " || ".join(h.rjust(w) for h, w in _STAT_COLUMNS)
+        lines += [_TABLE_RULE, f"|| {title:<20} || {header} ||", _TABLE_RULE]
+        lines += [_stat_row(label, g) for label, g in groups]
+    lines.append(_TABLE_RULE)
+    out.write("\n".join(lines) + "\n")
+
+
+def _show_paged(
+    title: str,
+    table: ApartmentTable,
+    rows: Sequence[int],
+    page_size: int | None = None,
+    limit: int | None = None,
+) -> None:
+    """Интерактивный вывод: по page_size строк с вопросом перед следующей страницей."""
+    if limit is not None and len(rows) > limit:
+        print(f"\n⚠️  Найдено {len(rows)} записей, будут показаны первые {limit}.")
+        rows = rows[:limit]
+    if not page_size or len(rows) <= page_size:
+        _print_apartments(title, table.rows(rows))
+        return
+
+    pages = (len(rows) + page_size - 1) // page_size
+    for page in range(pages):
+        start = page * page_size
+        _print_apartments(f"{title} — стр. {page + 1}/{pages}", table.rows(rows[start:start + page_size]))
+        if page + 1 < pages:
+            answer = input("Enter — следующая страница, q — вернуться в меню: ").strip().lower()
+            if answer == "q":
+                break
+
+
+def sort_all_rows(table: ApartmentTable, lazy: bool = False) -> Sequence[int]:
+    """
+    Порядок задачи 1 по всей таблице (запрос task_all без сохраненных
+    порядков). lazy=True — постраничный режим: вычисляются только
+    запрошенные первые строки.
+    """
+    return QueryEngine(table).run(task_all(), lazy=lazy)
+
+
+def load_dataset(
+    json_path: str,
+    workers: int | None = None,
+    out: TextIO | None = None,
+    validation: str = "full",
+) -> ApartmentTable | None:
+    """
+    Загрузка базы с выводом отчета о некорректных записях в out.
+    Возвращает None, если не удалось загрузить ни одной валидной записи.
     """
-    if not items:
-        return []
-    
     try:
-        decorated = [(key_fn(a), a) for a in items]
-        shell_sort(
-            decorated
-        )  # сортирует по первому элементу кортежа (key), затем по второму при равенстве
-        return [a for _, a in decorated]
+        if is_export_path(json_path):
+            # Выгрузка (listing_export) уже проверена и читается без кэша
+            table, invalid_count, error_messages = read_export_table(json_path)
+        else:
+            # Повторный запуск без изменений файла читает двоичный кэш (listing_cache)
+            table, invalid_count, error_messages = load_cached_table(
+                json_path, workers=workers, validation=validation
+            )
     except Exception as e:
-        # Если сортировка не удалась, возвращаем исходный список
-        print(f"⚠️  Предупреждение: ошибка сортировки - {e}. Возвращен исходный порядок.")
-        return items
+        print(f"\n⚠️  КРИТИЧЕСКАЯ ОШИБКА: Не удалось загрузить данные - {e}", file=out)
+        print("Программа завершена.", file=out)
+        return None
+
+    # Вывод предупреждения о некорректных записях
+    if invalid_count > 0:
+        print("\n" + "=" * 120, file=out)
+        print("⚠️  ВНИМАНИЕ: Обнаружены некорректные записи в базе данных!", file=out)
+        print("=" * 120, file=out)
+        print(f"Количество некорректных записей: {invalid_count}", file=out)
+        print(f"Количество валидных записей: {len(table)}", file=out)
+        print("\nДетали ошибок:", file=out)
+        print("-" * 120, file=out)
+        for error in error_messages[:10]:  # Показываем первые 10 ошибок
+            print(f"  • {error}", file=out)
+        # В режимах fast и trusted хранятся не все сообщения, но счетчик точный
+        hidden = max(len(error_messages), invalid_count) - len(error_messages[:10])
+        if hidden > 0:
+            print(f"  ... и еще {hidden} ошибок", file=out)
+        print("-" * 120, file=out)
+        print("\n⚠️  Некорректные записи будут исключены из обработки и сортировки.", file=out)
+        print("Работа программы продолжается только с валидными данными.\n", file=out)
+
+    if not len(table):
+        print("\n❌ ОШИБКА: Не удалось загрузить ни одной валидной записи.", file=out)
+        print(f"Проверьте файл {os.path.basename(json_path)} на наличие корректных данных.", file=out)
+        return None
+
+    print(f"\n✓ Успешно загружено валидных квартир: {len(table)}", file=out)
+    if len(table.shard_starts) > 1:
+        print(f"  из файлов базы (шардов): {len(table.shard_starts)}", file=out)
+    return table
+
 
+# ---------------------------------------------------------------------------
+# Пакетный режим
+# ---------------------------------------------------------------------------
 
-def main() -> None:
+OUTPUT_FORMATS = ("table", "csv", "jsonl")
+
+
+def parse_query(line: str) -> tuple[str, Sequence[int]]:
+    """
+    Разбор строки запроса:
+    all | rooms N | price N1 N2. Ошибки — ValueError с понятным сообщением.
+    """
+    parts = line.split()
+    kind = parts[0].lower()
+    try:
+        args = [int(p) for p in parts[1:]]
+    except ValueError:
+        raise ValueError(f"аргументы должны быть целыми числами: {line!r}") from None
+
+    expected = {"all": 0, "rooms": 1, "price": 2}
+    if kind not in expected:
+        raise ValueError(f"неизвестный запрос {parts[0]!r} (ожидается all, rooms, price)")
+    if len(args) != expected[kind]:
+        raise ValueError(f"запрос {kind!r} принимает аргументов: {expected[kind]}")
+    if kind == "price":
+        if args[0] < 0 or args[1] < 0:
+            raise ValueError("цены не могут быть отрицательными")
+        args.sort()
+    return kind, args
+
+
+def run_batch(
+    lines: Iterable[str],
+    table: ApartmentTable,
+    apt_index: ApartmentIndex,
+    fmt: str = "table",
+    out: TextIO | None = None,
+    err: TextIO | None = None,
+    limit: int | None = None,
+) -> int:
+    """
+    Выполняет запросы (по одному в строке, пустые строки и # — пропускаются)
+    над уже загруженной таблицей и пишет результаты в out в формате fmt.
+    Полная сортировка задачи 1 выполняется не больше одного раза;
+    limit ограничивает число записей в ответе на каждый запрос.
+    Возвращает число строк с ошибками.
+    """
+    out = out if out is not None else sys.stdout
+    err = err if err is not None else sys.stderr
+    # Движок сохраняет порядок задачи 1 между запросами пакета
+    engine = QueryEngine(table, apt_index)
+    csv_writer = None
+    failures = 0
+
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            kind, args = parse_query(line)
+        except ValueError as e:
+            print(f"строка {line_no}: {e}", file=err)
+            failures += 1
+            continue
+
+        rows = engine.run(PRESETS[kind](*args), lazy=limit is not None)
+        if kind == "all":
+            title = "1) Все квартиры (комнаты ↓, цена ↑)"
+        elif kind == "rooms":
+            title = f"2) Квартиры с {args[0]} комн (этаж ↑, этажность ↑, цена ↓)"
+        else:
+            n1, n2 = args
+            title = (
+                f"3) Квартиры в цене [{_format_price_rub(n1)}..{_format_price_rub(n2)}]"
+                " (цена ↓, общ.пл. ↑)"
+            )
+
+        query = " ".join([kind, *map(str, args)])
+        if fmt == "table":
+            _print_apartments(title, table.rows(rows), out, limit)
+        elif fmt == "csv":
+            if csv_writer is None:
+                csv_writer = csv.writer(out)
+                csv_writer.writerow(["query", *RECORD_FIELDS])
+            with profiling.stage("render"):
+                csv_writer.writerows([query, *record_fields(a)] for a in table.rows(rows[:limit]))
+            profiling.count("render.rows", len(rows[:limit]))
+        else:
+            with profiling.stage("render"):
+                for a in table.rows(rows[:limit]):
+                    record = dict(zip(RECORD_FIELDS, record_fields(a)))
+                    out.write(json.dumps({"query": query, **record}, ensure_ascii=False) + "\n")
+            profiling.count("render.rows", len(rows[:limit]))
+
+    return failures
+
+
+def _positive_int(text: str) -> int:
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError("ожидается положительное число")
+    return value
+
+
+def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="База квартир риэлтерского агентства. Без --batch — интерактивное меню.",
+    )
+    parser.add_argument(
+        "--data",
+        default="./aprtment.json",
+        help="файл с квартирами (JSONC), каталог или шаблон файлов-шардов ('shards/*.json'),"
+        " или выгрузка .aptcol / .csv (--export)",
+    )
+    parser.add_argument(
+        "--export",
+        metavar="FILE",
+        help="выгрузить проверенные записи в FILE (.aptcol — двоичный столбцовый, .csv) и выйти",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="файл запросов (all | rooms N | price N1 N2), '-' — стандартный ввод",
+    )
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="table", help="формат вывода")
+    parser.add_argument("--output", metavar="FILE", help="файл результатов (по умолчанию stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="процессов для проверки записей")
+    parser.add_argument(
+        "--validation",
+        choices=VALIDATION_LEVELS,
+        default="full",
+        help="проверка записей: full — все проверки, fast — до первой ошибки записи,"
+        " trusted — без проверок (проверенные источники)",
+    )
+    parser.add_argument("--limit", type=_positive_int, default=None, help="не больше N записей в ответе")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"сводка времени по этапам в stderr при выходе (или {profiling.ENV_VAR}=1)",
+    )
+    parser.add_argument("--profile-out", metavar="FILE", help="записать профиль cProfile (pstats) в FILE")
+    parser.add_argument(
+        "--page-size",
+        type=_positive_int,
+        default=None,
+        help="интерактивный режим: выводить по N записей на страницу",
+    )
+    parser.add_argument(
+        "--watch",
+        type=float,
+        metavar="SECONDS",
+        default=None,
+        help="интерактивный режим: проверять изменения файла базы не чаще раза в SECONDS и применять их",
+    )
+    return parser.parse_args(argv)
+
+
+def report_reload(result: ReloadResult, out: TextIO | None = None) -> None:
+    if result.error is not None:
+        print(f"\n⚠️  Файл базы изменился, но не прочитан: {result.error}", file=out)
+        print("Работа продолжается с прежними данными.", file=out)
+    elif result.changed:
+        print(
+            f"\n🔄 База обновлена: добавлено {result.added}, изменено {result.updated},"
+            f" удалено {result.removed}; некорректных записей: {result.invalid_count}",
+            file=out,
+        )
+
+
+def _main_export(args: argparse.Namespace) -> int:
+    if not is_export_path(args.export):
+        print(f"❌ Формат выгрузки определяется расширением: {', '.join(EXPORT_SUFFIXES)}", file=sys.stderr)
+        return 2
+    table = load_dataset(args.data, args.workers, sys.stderr, args.validation)
+    if table is None:
+        return 1
+    try:
+        rows = export_apartments(table.rows(), args.export)
+    except (OSError, ValueError) as e:
+        print(f"❌ Не удалось выгрузить записи: {e}", file=sys.stderr)
+        return 1
+    print(f"✓ Выгружено записей: {rows} → {args.export}", file=sys.stderr)
+    return 0
+
+
+def _main_batch(args: argparse.Namespace) -> int:
+    with contextlib.ExitStack() as files:
+        # Файлы открываются до загрузки базы: ошибка в пути видна сразу
+        try:
+            src = sys.stdin if args.batch == "-" else files.enter_context(open(args.batch, "r", encoding="utf-8"))
+            dst = sys.stdout if not args.output else files.enter_context(
+                open(args.output, "w", encoding="utf-8", newline="")
+            )
+        except OSError as e:
+            print(f"❌ Не удалось открыть файл: {e}", file=sys.stderr)
+            return 2
+
+        # Отчет о загрузке — в stderr, чтобы не смешивать его с результатами
+        table = load_dataset(args.data, args.workers, sys.stderr, args.validation)
+        if table is None:
+            return 1
+        with profiling.stage("index.build"):
+            apt_index = ApartmentIndex(table)
+        failures = run_batch(src, table, apt_index, args.format, dst, limit=args.limit)
+    return 1 if failures else 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
     """
     Главная зацикленная функция:
     1 — вывод всех квартир (комнаты ↓, цена ↑)
     2 — вывод квартир с заданным количеством комнат
     3 — вывод квартир в диапазоне цен [N1, N2]
+    4 — статистика: цена за м², площади, по комнатам и улицам
     0 — выход
+    С --batch запросы читаются из файла без меню (см. run_batch),
+    с --export проверенные записи выгружаются в файл (listing_export).
     """
-    json_path = "./aprtment.json"
-    
-    try:
-        apartments, invalid_count, error_messages = read_apartments(json_path)
-    except Exception as e:
-        print(f"\n⚠️  КРИТИЧЕСКАЯ ОШИБКА: Не удалось загрузить данные - {e}")
-        print("Программа завершена.")
-        return
+    args = _parse_args(argv)
+    if args.profile or args.profile_out:
+        profiling.enable(args.profile_out)
+    if args.export is not None:
+        return _main_export(args)
+    if args.batch is not None:
+        return _main_batch(args)
 
-    # Вывод предупреждения о некорректных записях
-    if invalid_count > 0:
-        print("\n" + "=" * 120)
-        print("⚠️  ВНИМАНИЕ: Обнаружены некорректные записи в базе данных!")
-        print("=" * 120)
-        print(f"Количество некорректных записей: {invalid_count}")
-        print(f"Количество валидных записей: {len(apartments)}")
-        print("\nДетали ошибок:")
-        print("-" * 120)
-        for error in error_messages[:10]:  # Показываем первые 10 ошибок
-            print(f"  • {error}")
-        if len(error_messages) > 10:
-            print(f"  ... и еще {len(error_messages) - 10} ошибок")
-        print("-" * 120)
-        print("\n⚠️  Некорректные записи будут исключены из обработки и сортировки.")
-        print("Работа программы продолжается только с валидными данными.\n")
-
-    if not apartments:
-        print("\n❌ ОШИБКА: Не удалось загрузить ни одной валидной записи.")
-        print("Проверьте файл aprtment.json на наличие корректных данных.")
-        return
+    # Состояние файла до загрузки: изменение во время загрузки не потеряется
+    signature = file_signature(args.data) if args.watch is not None else None
+    table = load_dataset(args.data, args.workers, validation=args.validation)
+    if table is None:
+        return 1
 
-    print(f"\n✓ Успешно загружено валидных квартир: {len(apartments)}")
+    # Индексы для задач 2 и 3 строятся один раз
+    with profiling.stage("index.build"):
+        apt_index = ApartmentIndex(table)
+    engine = QueryEngine(table, apt_index)
+    stats = ListingStats(table)
+    paged = args.page_size is not None or args.limit is not None
+    reloader = None
+    if args.watch is not None and (len(table.shard_starts) > 1 or is_export_path(args.data)):
+        print("⚠️  --watch поддерживается только для базы из одного файла JSON, слежение выключено.")
+    elif args.watch is not None:
+        reloader = Reloader(table, apt_index, args.data, args.watch, args.workers, args.validation, signature)
 
     while True:
         try:
+            if reloader is not None:
+                result = reloader.poll()
+                if result is not None:
+                    if result.changed:
+                        engine.invalidate()
+                        stats.invalidate()
+                    report_reload(result)
             print("\nВыберите задачу:")
             print("1 — полный список всех квартир (комнаты ↓, цена ↑)")
             print("2 — квартиры с заданным количеством комнат")
             print("3 — квартиры в диапазоне стоимости [N1..N2]")
+            print("4 — статистика (цена за м², площади) по комнатам и улицам")
             print("0 — выход")
 
             choice = input("Ваш выбор: ").strip()
@@ -158,8 +570,15 @@ def main() -> None:
             elif choice == "1":
                 # комнаты (убыв) + стоимость (возр)
                 try:
-                    sorted_all = _shell_sorted(apartments, key_fn=lambda a: (-a.rooms, a.price))
-                    _print_apartments("1) Все квартиры (комнаты ↓, цена ↑)", sorted_all)
+                    # При постраничном выводе сортируется только показываемое начало
+                    sorted_all = engine.run(task_all(), lazy=paged)
+                    _show_paged(
+                        "1) Все квартиры (комнаты ↓, цена ↑)",
+                        table,
+                        sorted_all,
+                        args.page_size,
+                        args.limit,
+                    )
                 except Exception as e:
                     print(f"\n❌ Ошибка при сортировке: {e}")
                     continue
@@ -179,18 +598,17 @@ def main() -> None:
                     continue
 
                 try:
-                    filtered_rooms = [a for a in apartments if a.rooms == rooms]
-                    if not filtered_rooms:
+                    sorted_rooms = engine.run(task_rooms(rooms))
+                    if not sorted_rooms:
                         print(f"\n⚠️  Квартиры с {rooms} комнатами не найдены.")
                         continue
 
-                    sorted_rooms = _shell_sorted(
-                        filtered_rooms,
-                        key_fn=lambda a: (a.floor, a.total_floors, -a.price),
-                    )
-                    _print_apartments(
+                    _show_paged(
                         f"2) Квартиры с {rooms} комн (этаж ↑, этажность ↑, цена ↓)",
+                        table,
                         sorted_rooms,
+                        args.page_size,
+                        args.limit,
                     )
                 except Exception as e:
                     print(f"\n❌ Ошибка при обработке данных: {e}")
@@ -222,23 +640,29 @@ def main() -> None:
                     print(f"⚠️  Диапазон автоматически исправлен: [{n1}..{n2}]")
 
                 try:
-                    filtered_price = [a for a in apartments if n1 <= a.price <= n2]
-                    if not filtered_price:
+                    sorted_price = engine.run(task_price(n1, n2))
+                    if not sorted_price:
                         print(f"\n⚠️  Квартиры в диапазоне [{_format_price_rub(n1)}..{_format_price_rub(n2)}] не найдены.")
                         continue
 
-                    sorted_price = _shell_sorted(
-                        filtered_price,
-                        key_fn=lambda a: (-a.price, a.total_area),
-                    )
-                    _print_apartments(
+                    _show_paged(
                         f"3) Квартиры в цене [{_format_price_rub(n1)}..{_format_price_rub(n2)}] (цена ↓, общ.пл. ↑)",
+                        table,
                         sorted_price,
+                        args.page_size,
+                        args.limit,
                     )
                 except Exception as e:
                     print(f"\n❌ Ошибка при обработке данных: {e}")
                     continue
 
+            elif choice == "4":
+                try:
+                    _print_stats(stats)
+                except Exception as e:
+                    print(f"\n❌ Ошибка при расчете статистики: {e}")
+                    continue
+
             else:
                 print("❌ Неизвестная команда, повторите ввод.")
 
@@ -250,6 +674,8 @@ def main() -> None:
             print("Попробуйте еще раз.")
             continue
 
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
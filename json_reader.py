@@ -1,8 +1,18 @@
 from __future__ import annotations
 
+import glob
 import json
+import mmap
+import os
+import re
+from array import array
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, TextIO, TypeVar
+
+import profiling
 
 
 @dataclass(slots=True, frozen=True)
@@ -27,29 +37,101 @@ class Apartment:
     price: int  # руб
 
 
+# Байты, которые удаляются при извлечении цифр: все, кроме ASCII-цифр
+# (в столбцовом варианте — и кроме разделителя). Символы вне ASCII кодируются
+# в UTF-8 байтами >= 0x80, поэтому цифрами не станут.
+_COLUMN_SEP = "\x1f"
+_NON_DIGIT_BYTES = bytes(b for b in range(256) if not 48 <= b <= 57)
+_NON_DIGIT_COLUMN_BYTES = _NON_DIGIT_BYTES.replace(b"\x1f", b"")
+
+# Строковый литерал JSON (возможно, незакрытый в конце текста)
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*'
+# Блочный комментарий (незакрытый поглощает текст до конца)
+_BLOCK_COMMENT = r"/\*[^*]*(?:\*+[^*/][^*]*)*"
+# Участок без комментариев (сохраняется через \1) или комментарий (удаляется)
+_JSONC_RE = re.compile(
+    r'((?:[^"/]+|' + _STRING + r'(?:"|\\?\Z)|/(?![/*]))+)'
+    r"|//[^\r\n]*"
+    r"|" + _BLOCK_COMMENT + r"(?:\*+/|\*+\Z|\Z)",
+    re.S,
+)
+# Самый длинный префикс, который не обрывается внутри строки или комментария
+_JSONC_SAFE_PREFIX_RE = re.compile(
+    r'(?:[^"/]+|' + _STRING + r'"|//[^\r\n]*[\r\n]|' + _BLOCK_COMMENT + r"\*+/|/(?=[^/*]))*",
+    re.S,
+)
+
+
+# Числа длиннее стольких цифр не переводятся в int (у int() есть предел длины
+# строки, и такие значения все равно не помещаются в поле): вместо них
+# возвращается _TOO_BIG, и проверка отклоняет запись
+_MAX_DIGITS = 19
+_TOO_BIG = 10**_MAX_DIGITS
+# Наибольшее допустимое значение числового поля: столбцы ApartmentTable,
+# кэш и выгрузка хранят числа как int64
+MAX_FIELD_VALUE = (1 << 63) - 1
+
+
+def _digits_value(digits: bytes | str) -> int:
+    """int of a digit string, _TOO_BIG for more than _MAX_DIGITS significant digits."""
+    if len(digits) <= _MAX_DIGITS:
+        return int(digits) if digits else 0
+    digits = digits.lstrip(b"0" if isinstance(digits, bytes) else "0")
+    return int(digits) if len(digits) <= _MAX_DIGITS else _TOO_BIG
+
+
 def _digits_to_int(value: Any) -> int:
     """
     Extract digits from strings like:
     - "6 500 000 рублей" -> 6500000
     - "54 м²" -> 54
-    Also accepts int/float-like.
+    Also accepts int/float-like. More than _MAX_DIGITS digits give _TOO_BIG.
     """
     if value is None:
         return 0
     if isinstance(value, int):
         return value
     if isinstance(value, float):
-        return int(value)
+        if value != value:  # NaN
+            return 0
+        return int(value) if abs(value) < _TOO_BIG else _TOO_BIG
     s = str(value)
-    # Fast digit-only extraction (no regex)
-    out = 0
-    has_digit = False
-    for ch in s:
-        o = ord(ch) - 48
-        if 0 <= o <= 9:
-            has_digit = True
-            out = out * 10 + o
-    return out if has_digit else 0
+    if s.isascii() and s.isdigit():
+        return _digits_value(s)
+    # Только ASCII-цифры: "²" и прочие юникодные цифры отбрасываются
+    digits = s.encode("utf-8", "surrogatepass").translate(None, _NON_DIGIT_BYTES)
+    return _digits_value(digits)
+
+
+def _digits_to_int_column(values: list[Any]) -> list[int]:
+    """
+    Column version of _digits_to_int: all strings of a column are joined and
+    cleaned by one bytes.translate call, then split back.
+    """
+    try:
+        joined = _COLUMN_SEP.join(values)
+    except TypeError:  # в столбце есть не только строки
+        return _split_by_type(values, _digits_to_int_column, _digits_to_int)
+    if joined.count(_COLUMN_SEP) != len(values) - 1 or not values:
+        return list(map(_digits_to_int, values))
+    digits = joined.encode("utf-8", "surrogatepass").translate(None, _NON_DIGIT_COLUMN_BYTES)
+    return [int(d) if 0 < len(d) <= _MAX_DIGITS else _digits_value(d) for d in digits.split(b"\x1f")]
+
+
+def _split_by_type(
+    values: list[Any],
+    column_fn: Callable[[list[Any]], list[Any]],
+    value_fn: Callable[[Any], Any],
+) -> list[Any]:
+    """
+    Mixed column (strings and numbers): strings go through the column
+    function in one call, the other values through value_fn one by one.
+    """
+    positions = [k for k, v in enumerate(values) if isinstance(v, str)]
+    result = [value_fn(v) if not isinstance(v, str) else None for v in values]
+    for k, r in zip(positions, column_fn([values[k] for k in positions])):
+        result[k] = r
+    return result
 
 
 def _strip_json_comments(text: str) -> str:
@@ -59,50 +141,9 @@ def _strip_json_comments(text: str) -> str:
     - /* block comments */
     Not a full JSONC parser, but enough for typical учебный файл.
     """
-    n = len(text)
-    i = 0
-    res: list[str] = []
-    in_str = False
-    esc = False
-
-    while i < n:
-        ch = text[i]
-        if in_str:
-            res.append(ch)
-            if esc:
-                esc = False
-            elif ch == "\\":
-                esc = True
-            elif ch == '"':
-                in_str = False
-            i += 1
-            continue
-
-        if ch == '"':
-            in_str = True
-            res.append(ch)
-            i += 1
-            continue
-
-        # // ...
-        if ch == "/" and i + 1 < n and text[i + 1] == "/":
-            i += 2
-            while i < n and text[i] not in "\r\n":
-                i += 1
-            continue
-
-        # /* ... */
-        if ch == "/" and i + 1 < n and text[i + 1] == "*":
-            i += 2
-            while i + 1 < n and not (text[i] == "*" and text[i + 1] == "/"):
-                i += 1
-            i = i + 2 if i + 1 < n else n
-            continue
-
-        res.append(ch)
-        i += 1
-
-    return "".join(res)
+    if "/" not in text:
+        return text
+    return _JSONC_RE.sub(r"\1", text)
 
 
 def _has_negative_value(value: Any) -> bool:
@@ -126,142 +167,1167 @@ def _has_negative_value(value: Any) -> bool:
     return False
 
 
-def read_apartments(json_path: str) -> tuple[list[Apartment], int, list[str]]:
+def _has_negative_column(values: list[Any]) -> list[bool]:
+    """Column version of _has_negative_value: a column without "-" is checked in one pass."""
+    try:
+        if "-" not in _COLUMN_SEP.join(values):
+            return [False] * len(values)
+    except TypeError:  # в столбце есть не только строки
+        return _split_by_type(values, _has_negative_column, _has_negative_value)
+    return [_has_negative_value(v) if "-" in v else False for v in values]
+
+
+def _safe_to_int(
+    value: Any,
+    field_name: str,
+    int_value: int | None = None,
+    negative: bool | None = None,
+) -> tuple[int, list[str]]:
     """
-    Reads apartments from aprtment.json and returns normalized records.
-    Returns: (valid_apartments, invalid_count, error_messages)
+    Безопасное преобразование в int с валидацией.
+    int_value / negative — значения, заранее посчитанные для всего столбца.
+    """
+    errs = []
+    if value is None:
+        errs.append(f"{field_name} не указано")
+        return 0, errs
+
+    if negative is None:
+        negative = _has_negative_value(value)
+    if negative:
+        errs.append(f"{field_name} отрицательное")
+
+    if int_value is None:
+        int_value = _digits_to_int(value)
+    if int_value <= 0:
+        errs.append(f"{field_name} должно быть положительным (получено: {value})")
+    elif int_value > MAX_FIELD_VALUE:
+        errs.append(f"{field_name}: значение слишком велико")
+
+    return int_value, errs
+
+
+# Числовые поля записи в порядке проверки
+_NUMERIC_FIELDS: tuple[tuple[str, str], ...] = (
+    ("rooms", "комнаты"),
+    ("total_area", "общая площадь"),
+    ("living_area", "жилая площадь"),
+    ("floor", "этаж"),
+    ("total_floors", "этажность"),
+    ("price", "цена"),
+)
+
+VALIDATE_BATCH_SIZE = 4096  # записей в одном пакете нормализации
+
+
+def _validate_record(
+    idx: int, item: Any, numbers: list[tuple[int, bool]] | None = None
+) -> Apartment | str:
+    """
+    Validates one raw record of the "apartments" array.
+    numbers — (int_value, negative) for each of _NUMERIC_FIELDS, if they were
+    already computed by _validate_batch.
+    Returns an Apartment, or an error message for invalid records.
     """
+    if not isinstance(item, dict):
+        return f"Запись #{idx}: не является словарем"
+
+    # Проверка адреса
+    addr = item.get("address")
+    if not isinstance(addr, dict):
+        return f"Запись #{idx}: отсутствует или некорректный адрес"
+
+    # Валидация полей адреса
+    street = str(addr.get("street", "")).strip()
+    house_raw = addr.get("house")
+    apartment_raw = addr.get("apartment")
+
+    # Проверка на отрицательные значения в текстовых полях
+    errors = []
+    if not street:
+        errors.append("улица пустая")
+    if _has_negative_value(street):
+        errors.append("улица содержит отрицательное значение")
+
+    if house_raw is None:
+        errors.append("дом не указан")
+    elif _has_negative_value(house_raw):
+        errors.append("дом содержит отрицательное значение")
+
+    if apartment_raw is None:
+        errors.append("квартира не указана")
+    elif _has_negative_value(apartment_raw):
+        errors.append("квартира содержит отрицательное значение")
+
+    # Преобразование house и apartment в строки
+    house = str(house_raw).strip() if house_raw is not None else ""
+    apartment = str(apartment_raw).strip() if apartment_raw is not None else ""
+
+    # Валидация числовых полей
+    values: list[int] = []
+    for k, (key, field_name) in enumerate(_NUMERIC_FIELDS):
+        if numbers is None:
+            value, field_errors = _safe_to_int(item.get(key), field_name)
+        else:
+            value, field_errors = _safe_to_int(item.get(key), field_name, *numbers[k])
+        values.append(value)
+        errors.extend(field_errors)
+    rooms, total_area, living_area, floor, total_floors, price = values
+
+    # Проверка владельца
+    owner_last_name = str(item.get("owner_last_name", "")).strip()
+    if not owner_last_name:
+        errors.append("фамилия владельца пустая")
+    if _has_negative_value(owner_last_name):
+        errors.append("фамилия владельца содержит отрицательное значение")
+
+    # Проверка логики (этаж не может быть больше этажности)
+    if floor > 0 and total_floors > 0 and floor > total_floors:
+        errors.append(f"этаж ({floor}) превышает этажность ({total_floors})")
+
+    # Если есть ошибки, запись некорректна
+    if errors:
+        return f"Запись #{idx} ({street}, д. {house}, кв. {apartment}): " + ", ".join(errors)
+
+    # Все проверки пройдены, создаем валидную запись
     try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            raw = f.read()
+        address = Address(
+            street=street,
+            house=house,
+            apartment=apartment,
+        )
+
+        return Apartment(
+            address=address,
+            rooms=rooms,
+            total_area=total_area,
+            living_area=living_area,
+            floor=floor,
+            total_floors=total_floors,
+            owner_last_name=owner_last_name,
+            price=price,
+        )
     except Exception as e:
-        return [], 0, [f"Ошибка чтения файла: {e}"]
+        return f"Запись #{idx}: ошибка создания объекта - {e}"
+
+
+def _is_negative(value: Any) -> bool:
+    # Строка без минуса не может быть отрицательной — _has_negative_value не нужен
+    if isinstance(value, str) and "-" not in value:
+        return False
+    return _has_negative_value(value)
+
+
+def _validate_record_fast(
+    idx: int, item: Any, numbers: list[tuple[int, bool]] | None = None
+) -> Apartment | str:
+    """
+    validation="fast": the checks of _validate_record in the same order, but
+    the record is rejected at its first error (the message names only it).
+    """
+    if not isinstance(item, dict):
+        return f"Запись #{idx}: не является словарем"
+    addr = item.get("address")
+    if not isinstance(addr, dict):
+        return f"Запись #{idx}: отсутствует или некорректный адрес"
+
+    street = str(addr.get("street", "")).strip()
+    house_raw = addr.get("house")
+    apartment_raw = addr.get("apartment")
+    house = str(house_raw).strip() if house_raw is not None else ""
+    apartment = str(apartment_raw).strip() if apartment_raw is not None else ""
+
+    error = None
+    if not street:
+        error = "улица пустая"
+    elif _is_negative(street):
+        error = "улица содержит отрицательное значение"
+    elif house_raw is None:
+        error = "дом не указан"
+    elif _is_negative(house_raw):
+        error = "дом содержит отрицательное значение"
+    elif apartment_raw is None:
+        error = "квартира не указана"
+    elif _is_negative(apartment_raw):
+        error = "квартира содержит отрицательное значение"
+
+    values: list[int] = []
+    if error is None:
+        for k, (key, field_name) in enumerate(_NUMERIC_FIELDS):
+            value = item.get(key)
+            if value is None:
+                error = f"{field_name} не указано"
+                break
+            if numbers is None:
+                int_value, negative = _digits_to_int(value), _is_negative(value)
+            else:
+                int_value, negative = numbers[k]
+            if negative:
+                error = f"{field_name} отрицательное"
+                break
+            if int_value <= 0:
+                error = f"{field_name} должно быть положительным (получено: {value})"
+                break
+            if int_value > MAX_FIELD_VALUE:
+                error = f"{field_name}: значение слишком велико"
+                break
+            values.append(int_value)
 
+    owner_last_name = ""
+    if error is None:
+        owner_last_name = str(item.get("owner_last_name", "")).strip()
+        if not owner_last_name:
+            error = "фамилия владельца пустая"
+        elif _is_negative(owner_last_name):
+            error = "фамилия владельца содержит отрицательное значение"
+        elif values[3] > values[4]:
+            error = f"этаж ({values[3]}) превышает этажность ({values[4]})"
+
+    if error is not None:
+        return f"Запись #{idx} ({street}, д. {house}, кв. {apartment}): {error}"
+
+    rooms, total_area, living_area, floor, total_floors, price = values
+    return Apartment(
+        Address(street, house, apartment),
+        rooms, total_area, living_area, floor, total_floors, owner_last_name, price,
+    )
+
+
+def _build_record_trusted(
+    idx: int, item: Any, numbers: list[tuple[int, bool]] | None = None
+) -> Apartment | str:
+    """
+    validation="trusted": no checks, the record is only normalized. A record
+    that cannot be read at all (not a dict, no address) is still rejected.
+    """
     try:
-        raw = _strip_json_comments(raw)
-        data = json.loads(raw)
-    except Exception as e:
-        return [], 0, [f"Ошибка парсинга JSON: {e}"]
+        addr = item["address"]
+        if numbers is None:
+            values = [_digits_to_int(item.get(key)) for key, _ in _NUMERIC_FIELDS]
+        else:
+            values = [int_value for int_value, _ in numbers]
+        # Без проверок, но значение, которое не поместится в столбец, не принимается
+        for value, (_, field_name) in zip(values, _NUMERIC_FIELDS):
+            if abs(value) > MAX_FIELD_VALUE:
+                return f"Запись #{idx}: {field_name}: значение слишком велико"
+        return Apartment(
+            Address(
+                str(addr.get("street", "")).strip(),
+                str(addr.get("house", "")).strip(),
+                str(addr.get("apartment", "")).strip(),
+            ),
+            *values[:5],
+            str(item.get("owner_last_name", "")).strip(),
+            values[5],
+        )
+    except (TypeError, KeyError, AttributeError, IndexError, ValueError):
+        return f"Запись #{idx}: не удалось прочитать запись"
 
-    items = data.get("apartments", [])
-    if not isinstance(items, list):
-        return [], 0, ["Ошибка: 'apartments' не является списком"]
 
-    valid_apartments: list[Apartment] = []
-    invalid_count = 0
-    error_messages: list[str] = []
+# Уровни проверки записей:
+#   full    — все проверки, в сообщении перечислены все ошибки записи;
+#   fast    — запись отклоняется на первой ошибке, хранятся только первые
+#             ERROR_MESSAGES_KEPT сообщений (число ошибок считается полностью);
+#   trusted — без проверок, для файлов из проверенных источников.
+VALIDATION_LEVELS = ("full", "fast", "trusted")
+ERROR_MESSAGES_KEPT = 10
+
+_RECORD_VALIDATORS = {
+    "full": _validate_record,
+    "fast": _validate_record_fast,
+    "trusted": _build_record_trusted,
+}
 
-    for idx, item in enumerate(items, 1):
-        if not isinstance(item, dict):
-            invalid_count += 1
-            error_messages.append(f"Запись #{idx}: не является словарем")
-            continue
 
-        # Проверка адреса
+def check_validation(validation: str) -> None:
+    if validation not in VALIDATION_LEVELS:
+        raise ValueError(
+            f"неизвестный уровень проверки {validation!r} (допустимы: {', '.join(VALIDATION_LEVELS)})"
+        )
+
+
+def error_messages_limit(validation: str) -> int | None:
+    """How many error messages a loader keeps for the level (None — all)."""
+    return None if validation == "full" else ERROR_MESSAGES_KEPT
+
+
+_ADDRESS_TEXT_FIELDS = ("street", "house", "apartment")
+
+
+def _share_text_values(dicts: list[dict[str, Any]]) -> None:
+    """
+    Replaces the text fields of the records (address and owner) with one
+    stripped string object per distinct value of the block: the validators'
+    str(...).strip() then returns that object, so records of the block share
+    their strings instead of each keeping a copy.
+    """
+    shared: dict[str, str] = {}
+    for item in dicts:
         addr = item.get("address")
-        if not isinstance(addr, dict):
-            invalid_count += 1
-            error_messages.append(f"Запись #{idx}: отсутствует или некорректный адрес")
-            continue
-
-        # Валидация полей адреса
-        street = str(addr.get("street", "")).strip()
-        house_raw = addr.get("house")
-        apartment_raw = addr.get("apartment")
-
-        # Проверка на отрицательные значения в текстовых полях
-        errors = []
-        if not street:
-            errors.append("улица пустая")
-        if _has_negative_value(street):
-            errors.append("улица содержит отрицательное значение")
-
-        if house_raw is None:
-            errors.append("дом не указан")
-        elif _has_negative_value(house_raw):
-            errors.append("дом содержит отрицательное значение")
-
-        if apartment_raw is None:
-            errors.append("квартира не указана")
-        elif _has_negative_value(apartment_raw):
-            errors.append("квартира содержит отрицательное значение")
-
-        # Преобразование house и apartment в строки
-        house = str(house_raw).strip() if house_raw is not None else ""
-        apartment = str(apartment_raw).strip() if apartment_raw is not None else ""
-
-        # Валидация числовых полей
-        def _safe_to_int(value: Any, field_name: str) -> tuple[int, list[str]]:
-            """Безопасное преобразование в int с валидацией"""
-            errs = []
-            if value is None:
-                errs.append(f"{field_name} не указано")
-                return 0, errs
+        if isinstance(addr, dict):
+            for key in _ADDRESS_TEXT_FIELDS:
+                value = addr.get(key)
+                if type(value) is str:
+                    text = shared.get(value)
+                    if text is None:
+                        text = shared[value] = value.strip()
+                    addr[key] = text
+        value = item.get("owner_last_name")
+        if type(value) is str:
+            text = shared.get(value)
+            if text is None:
+                text = shared[value] = value.strip()
+            item["owner_last_name"] = text
 
-            if _has_negative_value(value):
-                errs.append(f"{field_name} отрицательное")
 
-            int_value = _digits_to_int(value)
-            if int_value <= 0:
-                errs.append(f"{field_name} должно быть положительным (получено: {value})")
+def _validate_batch(
+    start_idx: int, items: list[Any], validation: str = "full"
+) -> list[Apartment | str]:
+    """
+    Validates a block of records; numeric fields are normalized column by
+    column (_digits_to_int_column / _has_negative_column) instead of per value,
+    text fields are stripped once per distinct value (_share_text_values).
+    validation="trusted" skips the search for negative values.
+    """
+    dicts = [item for item in items if isinstance(item, dict)]
+    _share_text_values(dicts)
+    trusted = validation == "trusted"
+    columns = []
+    for key, _ in _NUMERIC_FIELDS:
+        raw = [item.get(key) for item in dicts]
+        present = [v for v in raw if v is not None]
+        ints = iter(_digits_to_int_column(present))
+        negs = iter([False] * len(present) if trusted else _has_negative_column(present))
+        columns.append([(0, False) if v is None else (next(ints), next(negs)) for v in raw])
 
-            return int_value, errs
+    validate = _RECORD_VALIDATORS[validation]
+    results: list[Apartment | str] = []
+    row = 0
+    for idx, item in enumerate(items, start_idx):
+        if isinstance(item, dict):
+            results.append(validate(idx, item, [col[row] for col in columns]))
+            row += 1
+        else:
+            results.append(validate(idx, item))
+    return results
 
-        rooms, room_errors = _safe_to_int(item.get("rooms"), "комнаты")
-        total_area, area_errors = _safe_to_int(item.get("total_area"), "общая площадь")
-        living_area, living_errors = _safe_to_int(item.get("living_area"), "жилая площадь")
-        floor, floor_errors = _safe_to_int(item.get("floor"), "этаж")
-        total_floors, floors_errors = _safe_to_int(item.get("total_floors"), "этажность")
-        price, price_errors = _safe_to_int(item.get("price"), "цена")
 
-        errors.extend(room_errors)
-        errors.extend(area_errors)
-        errors.extend(living_errors)
-        errors.extend(floor_errors)
-        errors.extend(floors_errors)
-        errors.extend(price_errors)
+# ---------------------------------------------------------------------------
+# Потоковое чтение
+# ---------------------------------------------------------------------------
 
-        # Проверка владельца
-        owner_last_name = str(item.get("owner_last_name", "")).strip()
-        if not owner_last_name:
-            errors.append("фамилия владельца пустая")
-        if _has_negative_value(owner_last_name):
-            errors.append("фамилия владельца содержит отрицательное значение")
+STREAM_CHUNK_SIZE = 1 << 16  # символов за одно чтение файла
 
-        # Проверка логики (этаж не может быть больше этажности)
-        if floor > 0 and total_floors > 0 and floor > total_floors:
-            errors.append(f"этаж ({floor}) превышает этажность ({total_floors})")
+_WS_RE = re.compile(r"[ \t\n\r]*")
 
-        # Если есть ошибки, добавляем в список некорректных
-        if errors:
-            invalid_count += 1
-            error_msg = f"Запись #{idx} ({street}, д. {house}, кв. {apartment}): " + ", ".join(errors)
-            error_messages.append(error_msg)
-            continue
 
-        # Все проверки пройдены, создаем валидную запись
+@dataclass(slots=True, frozen=True)
+class RecordError:
+    index: int  # номер записи (с 1); 0 — ошибка уровня файла
+    message: str
+
+
+class _CommentStripper:
+    """
+    Streaming version of _strip_json_comments: a chunk is cut after its longest
+    prefix of complete tokens, the tail (unfinished string or comment) waits
+    for the next chunk.
+    """
+
+    __slots__ = ("_parts", "_size", "_scanned")
+
+    def __init__(self) -> None:
+        self._parts: list[str] = []
+        self._size = 0
+        self._scanned = 0  # длина хвоста, оставшегося после прошлого разбора
+
+    def feed(self, chunk: str, final: bool = False) -> str:
+        self._parts.append(chunk)
+        self._size += len(chunk)
+        # Хвост разбирается заново, только когда к нему добавилось не меньше его
+        # длины: длинная (или незакрытая) строка не дает квадратичной работы
+        if not final and self._size < 2 * self._scanned:
+            return ""
+        text = "".join(self._parts)
+        if final:
+            self._parts, self._size, self._scanned = [], 0, 0
+            return _strip_json_comments(text)
+        cut = _JSONC_SAFE_PREFIX_RE.match(text).end()
+        pending = text[cut:]
+        self._parts, self._size, self._scanned = [pending], len(pending), len(pending)
+        return _strip_json_comments(text[:cut])
+
+
+def _iter_stripped_chunks(f: TextIO, chunk_size: int) -> Iterator[str]:
+    stripper = _CommentStripper()
+    while True:
+        with profiling.stage("load.read"):
+            chunk = f.read(chunk_size)
+        if not chunk:
+            tail = stripper.feed("", final=True)
+            if tail:
+                yield tail
+            return
+        with profiling.stage("load.strip_comments"):
+            stripped = stripper.feed(chunk)
+        yield stripped
+
+
+# Ошибка разбора не дальше стольких символов от конца буфера может означать
+# значение, оборванное границей куска (литерал, число, escape \uXXXX\uXXXX)
+_TRUNCATED_TAIL = 16
+
+
+class _JsonStream:
+    """Buffer over a stream of comment-free chunks, decoding one JSON value at a time."""
+
+    __slots__ = ("_chunks", "_buf", "_pos", "_eof", "_decoder")
+
+    def __init__(self, chunks: Iterator[str]) -> None:
+        self._chunks = chunks
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        # Прочитанная часть буфера отбрасывается, а новых данных читается не
+        # меньше, чем осталось непрочитанных: значение, занимающее много кусков,
+        # дочитывается за O(log n) склеек, а не за одну на кусок
+        rest = self._buf[self._pos:]
+        parts = [rest]
+        size = 0
+        for chunk in self._chunks:
+            if chunk:
+                parts.append(chunk)
+                size += len(chunk)
+                if size >= len(rest):
+                    break
+        else:
+            self._eof = True
+        if not size:
+            return False
+        self._buf = "".join(parts)
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next significant character, "" at the end of the stream."""
+        while True:
+            self._pos = _WS_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def take(self) -> str:
+        ch = self.peek()
+        if ch:
+            self._pos += 1
+        return ch
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                # Значение могло оборваться на границе куска; ошибка в середине
+                # буфера следующими кусками уже не исправится
+                if self._at_end(e) and self._fill():
+                    continue
+                raise
+            # Число в самом конце буфера может продолжаться в следующем куске
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+    def _at_end(self, error: json.JSONDecodeError) -> bool:
+        """Whether the decode error may be caused by the end of the buffer."""
+        # Для незакрытой строки позиция указывает на ее начало
+        return error.pos >= len(self._buf) - _TRUNCATED_TAIL or error.msg.startswith("Unterminated string")
+
+    def expect(self, chars: str) -> str:
+        ch = self.take()
+        if not ch or ch not in chars:
+            found = repr(ch) if ch else "конец файла"
+            raise ValueError(f"ожидался один из символов {chars!r}, найдено {found}")
+        return ch
+
+
+class _NotAList(ValueError):
+    pass
+
+
+def _iter_raw_items(stream: _JsonStream) -> Iterator[Any]:
+    """
+    Yields raw items of the top-level "apartments" array without loading the
+    rest; the other keys and the end of the file are still checked, so the
+    stream ends with an error wherever json.load would fail.
+    """
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.take()
+    else:
+        while True:
+            key = stream.value()
+            if not isinstance(key, str):
+                raise ValueError(f"ожидался ключ объекта, найдено {key!r}")
+            stream.expect(":")
+            if key != "apartments":
+                stream.value()  # значение другого ключа пропускается
+            elif stream.peek() != "[":
+                raise _NotAList()
+            else:
+                stream.take()
+                if stream.peek() == "]":
+                    stream.take()
+                else:
+                    while True:
+                        yield stream.value()
+                        if stream.expect(",]") == "]":
+                            break
+            if stream.expect(",}") == "}":
+                break
+    if stream.peek():
+        raise ValueError("лишние данные после конца JSON")
+
+
+def _iter_raw_batches(
+    items: Iterator[Any], failure: list[RecordError]
+) -> Iterator[tuple[int, list[Any]]]:
+    """
+    Groups raw items into (first record number, batch) pairs.
+    A file-level error stops the stream and is appended to `failure`.
+    """
+    idx = 1
+    while not failure:
+        # В потоковом режиме время разбора включает чтение и удаление комментариев
+        with profiling.stage("load.json_decode"):
+            batch = _take_batch(items, failure)
+        if batch:
+            yield idx, batch
+            idx += len(batch)
+        if len(batch) < VALIDATE_BATCH_SIZE:
+            return
+
+
+def _take_batch(items: Iterator[Any], failure: list[RecordError]) -> list[Any]:
+    batch: list[Any] = []
+    while len(batch) < VALIDATE_BATCH_SIZE:
         try:
-            address = Address(
-                street=street,
-                house=house,
-                apartment=apartment,
-            )
-
-            apt = Apartment(
-                address=address,
-                rooms=rooms,
-                total_area=total_area,
-                living_area=living_area,
-                floor=floor,
-                total_floors=total_floors,
-                owner_last_name=owner_last_name,
-                price=price,
-            )
-            valid_apartments.append(apt)
+            batch.append(next(items))
+        except StopIteration:
+            break
+        except _NotAList:
+            failure.append(RecordError(0, "Ошибка: 'apartments' не является списком"))
+            break
+        except UnicodeDecodeError as e:
+            failure.append(RecordError(0, f"Ошибка чтения файла: {e}"))
+            break
         except Exception as e:
-            invalid_count += 1
-            error_messages.append(f"Запись #{idx}: ошибка создания объекта - {e}")
+            failure.append(RecordError(0, f"Ошибка парсинга JSON: {e}"))
+            break
+    return batch
+
+
+def _validated_batches(
+    batches: Iterable[tuple[int, list[Any]]],
+    workers: int | None = None,
+    validation: str = "full",
+) -> Iterator[tuple[int, list[Apartment | str]]]:
+    """
+    Validates batches and yields (first record number, results) in the input order.
+    workers > 1 spreads the batches over a ProcessPoolExecutor; at most
+    2 * workers batches are in flight, so the memory stays bounded.
+    """
+    if not workers or workers <= 1:
+        for start, batch in batches:
+            with profiling.stage("load.validate"):
+                results = _validate_batch(start, batch, validation)
+            _count_results(results)
+            yield start, results
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque[tuple[int, Future]] = deque()
+        for start, batch in batches:
+            pending.append((start, pool.submit(_validate_batch, start, batch, validation)))
+            while pending and (len(pending) >= 2 * workers or pending[0][1].done()):
+                start, future = pending.popleft()
+                with profiling.stage("load.validate(wait)"):
+                    results = future.result()
+                _count_results(results)
+                yield start, results
+        while pending:
+            start, future = pending.popleft()
+            with profiling.stage("load.validate(wait)"):
+                results = future.result()
+            _count_results(results)
+            yield start, results
+
+
+def _count_results(results: list[Apartment | str]) -> None:
+    if profiling.ENABLED:
+        invalid = sum(isinstance(r, str) for r in results)
+        profiling.count("load.records", len(results))
+        profiling.count("load.invalid", invalid)
+
+
+def iter_apartments(
+    json_path: str,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    workers: int | None = None,
+    validation: str = "full",
+) -> Iterator[Apartment | RecordError]:
+    """
+    Streaming variant of read_apartments: reads the file in chunks and yields
+    validated Apartment records and RecordError entries one by one.
+    Memory use does not depend on the file size.
+    A file-level error (reading / JSON syntax) is yielded as RecordError with
+    index 0 and stops the stream; records yielded before it came from a file
+    that is not valid JSON, so read_apartments and read_apartment_table
+    discard them.
+    workers > 1 validates batches in that many processes (order is kept).
+    validation — level of record checks, see VALIDATION_LEVELS.
+    """
+    check_validation(validation)
+    try:
+        f = open(json_path, "r", encoding="utf-8")
+    except Exception as e:
+        yield RecordError(0, f"Ошибка чтения файла: {e}")
+        return
+
+    with f:
+        items = _iter_raw_items(_JsonStream(_iter_stripped_chunks(f, chunk_size)))
+        failure: list[RecordError] = []
+        batches = _iter_raw_batches(items, failure)
+        for idx, results in _validated_batches(batches, workers, validation):
+            for result in results:
+                yield RecordError(idx, result) if isinstance(result, str) else result
+                idx += 1
+        yield from failure
+
+
+# ---------------------------------------------------------------------------
+# Чтение через mmap
+# ---------------------------------------------------------------------------
+
+MAPPED_SCAN_STEP = 4096  # записей, границы которых ищутся за один шаг
+
+# Выражения работают с байтами UTF-8 прямо в mmap: все служебные символы
+# JSON — ASCII, а байты многобайтовых символов >= 0x80 с ними не совпадают.
+_B_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_B_COMMENT = rb"//[^\r\n]*|/\*[^*]*\*+(?:[^/*][^*]*\*+)*/"
+_B_SPACE = rb"(?:[ \t\r\n]|" + _B_COMMENT + rb")*"
+_B_SCALAR = rb'[^\s,:\[\]{}"/]+'
+_B_SPACE_RE = re.compile(_B_SPACE)
+_B_STRING_RE = re.compile(_B_STRING)
+_B_TOKEN_RE = re.compile(
+    _B_SPACE + rb"(?:(" + _B_STRING + rb")|([\[{])|([\]}])|([,:])|(" + _B_SCALAR + rb"))"
+)
+
+
+def _b_nested(inner: bytes) -> bytes:
+    # Каждое повторение начинается с кавычки, "/" или скобки, поэтому
+    # разбиение текста однозначно и откат при несовпадении линейный
+    plain = rb'[^\[\]{}"/]*'
+    return rb"[\[{]" + plain + rb"(?:(?:" + _B_STRING + rb"|" + _B_COMMENT + inner + rb")" + plain + rb")*[\]}]"
+
+
+# Элемент массива целиком: запись с вложенностью скобок до 3 (адрес внутри
+# записи — 2) или скаляр, затем разделитель "," или "]"
+_B_ELEMENT_RE = re.compile(
+    _B_SPACE
+    + rb"(" + _b_nested(rb"|" + _b_nested(rb"|" + _b_nested(b""))) + rb"|" + _B_STRING + rb"|" + _B_SCALAR + rb")"
+    + _B_SPACE + rb"([,\]])"
+)
+
+
+def _b_skip_value(buf: Any, pos: int) -> tuple[int, int]:
+    """(start, end) of the JSON value at pos; slow path for values of any depth."""
+    depth = 0
+    start = -1
+    while True:
+        m = _B_TOKEN_RE.match(buf, pos)
+        kind = m.lastindex if m is not None else None
+        if kind is None or kind == 4 and depth == 0 or kind == 3 and depth == 0:
+            raise ValueError(f"ожидалось значение JSON (байт {pos})")
+        if start < 0:
+            start = m.start(kind)
+        pos = m.end()
+        if kind == 2:
+            depth += 1
+        elif kind == 3:
+            depth -= 1
+        if depth == 0:
+            return start, pos
+
+
+class MappedListing:
+    """
+    Records of the top-level "apartments" array of a JSON(C) file mapped into
+    memory with mmap. Record boundaries are found by scanning the bytes in
+    place (lazily, MAPPED_SCAN_STEP records at a time); a record is decoded
+    only when it is requested, so record #N does not need the ones before it
+    to be parsed, and the file costs page cache instead of Python heap.
+    Like any mmap, the file must not be rewritten in place while it is
+    mapped: a rewrite is detected (size, mtime) before every scan step and
+    batch and raises ValueError, but a truncation in the middle of a step
+    still kills the process with SIGBUS. That is why the loaders use it only
+    on request (mapped=True).
+    Format errors raise ValueError ("apartments" that is not an array —
+    _NotAList).
+    """
+
+    __slots__ = ("path", "_file", "_map", "_stat", "_starts", "_ends", "_pos", "_done", "_released")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        self._map: Any = b""
+        try:
+            st = os.fstat(self._file.fileno())
+            self._stat = (st.st_size, st.st_mtime_ns)
+            # Пустой файл не отображается — для него достаточно пустых байтов
+            if st.st_size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._starts = array("q")
+            self._ends = array("q")
+            self._done = False
+            self._released = 0
+            self._pos = self._open_array()
+        except BaseException:
+            self.close()
+            raise
+
+    def _peek(self, pos: int) -> tuple[int, bytes]:
+        """Position and byte of the next significant character (b"" at the end)."""
+        pos = _B_SPACE_RE.match(self._map, pos).end()
+        return pos, self._map[pos:pos + 1]
+
+    def _unexpected(self, pos: int, found: bytes, chars: str) -> ValueError:
+        what = repr(found.decode("utf-8", "replace")) if found else "конец файла"
+        return ValueError(f"ожидался один из символов {chars!r}, найдено {what} (байт {pos})")
+
+    def _key(self, pos: int) -> tuple[int, str]:
+        """Reads `"key":` at pos; returns the position of the value and the key."""
+        pos, _ = self._peek(pos)
+        m = _B_STRING_RE.match(self._map, pos)
+        if m is None:
+            raise ValueError(f"ожидался ключ объекта (байт {pos})")
+        pos, ch = self._peek(m.end())
+        if ch != b":":
+            raise self._unexpected(pos, ch, ":")
+        return pos + 1, json.loads(m.group())
+
+    def _open_array(self) -> int:
+        """Reads the top-level object up to the "apartments" array; returns the scan position."""
+        pos, ch = self._peek(0)
+        if ch != b"{":
+            raise self._unexpected(pos, ch, "{")
+        pos, ch = self._peek(pos + 1)
+        if ch == b"}":
+            return self._end_of_object(pos)
+        while True:
+            pos, key = self._key(pos)
+            if key == "apartments":
+                pos, ch = self._peek(pos)
+                if ch != b"[":
+                    raise _NotAList()
+                end, ch = self._peek(pos + 1)
+                if ch == b"]":
+                    return self._end_of_object(end + 1)
+                return pos + 1
+            pos = self._skip_key_value(pos)
+            pos, ch = self._peek(pos)
+            if ch == b"}":
+                return self._end_of_object(pos)
+            if ch != b",":
+                raise self._unexpected(pos, ch, ",}")
+            pos += 1
+
+    def _skip_key_value(self, pos: int) -> int:
+        """Skips the value of a key other than "apartments"; returns the position after it."""
+        start, end = _b_skip_value(self._map, pos)
+        # Сканер границ принимает любое слово без кавычек, поэтому значение
+        # проверяется разбором: ошибка в нем делает некорректным весь файл
+        try:
+            _decode_json_bytes(self._map[start:end])
+        except ValueError as e:
+            raise ValueError(f"некорректное значение (байт {start}): {e}") from None
+        return end
+
+    def _end_of_object(self, pos: int) -> int:
+        """Checks the rest of the top-level object after pos and marks the scan done."""
+        while True:
+            pos, ch = self._peek(pos)
+            if ch == b"}":
+                break
+            if ch != b",":
+                raise self._unexpected(pos, ch, ",}")
+            pos, _ = self._key(pos + 1)
+            pos = self._skip_key_value(pos)
+        pos, ch = self._peek(pos + 1)
+        # Незакрытый /* в конце файла — комментарий до конца, как в _strip_json_comments
+        if ch and self._map[pos:pos + 2] != b"/*":
+            raise ValueError(f"лишние данные после конца JSON (байт {pos})")
+        self._done = True
+        return pos
+
+    def _check_unchanged(self) -> None:
+        """
+        Raises ValueError if the file was rewritten since it was mapped:
+        reading the pages of a truncated file would kill the process
+        (SIGBUS), so the file is checked before every scan step and batch.
+        """
+        st = os.fstat(self._file.fileno())
+        if (st.st_size, st.st_mtime_ns) != self._stat:
+            raise ValueError("файл изменился во время чтения")
+
+    def _scan(self, count: int) -> None:
+        """Finds the boundaries of up to `count` more records."""
+        self._check_unchanged()
+        buf, pos = self._map, self._pos
+        starts, ends = self._starts, self._ends
+        match = _B_ELEMENT_RE.match
+        with profiling.stage("load.scan"):
+            while count > 0 and not self._done:
+                m = match(buf, pos)
+                if m is not None:
+                    start, end = m.span(1)
+                    pos, sep = m.end(), m.group(2)
+                else:
+                    # Запись глубже трех уровней скобок или синтаксическая ошибка
+                    start, end = _b_skip_value(buf, pos)
+                    pos, sep = self._peek(end)
+                    if sep not in (b",", b"]"):
+                        raise self._unexpected(pos, sep, ",]")
+                    pos += 1
+                starts.append(start)
+                ends.append(end)
+                count -= 1
+                if sep == b"]":
+                    pos = self._end_of_object(pos)
+                self._pos = pos
+
+    def _ensure(self, n: int) -> None:
+        while len(self._starts) <= n and not self._done:
+            self._scan(MAPPED_SCAN_STEP)
+
+    def __len__(self) -> int:
+        """Number of records; scans the whole file on the first call."""
+        while not self._done:
+            self._scan(MAPPED_SCAN_STEP)
+        return len(self._starts)
+
+    def raw(self, n: int) -> bytes:
+        """UTF-8 text of record n (from 0), comments inside it included."""
+        if n < 0:
+            n += len(self)
+        self._ensure(n)
+        if not 0 <= n < len(self._starts):
+            raise IndexError(f"нет записи с номером {n}")
+        self._check_unchanged()
+        return self._map[self._starts[n]:self._ends[n]]
+
+    def item(self, n: int) -> Any:
+        """Decoded record n (a dict for well-formed records)."""
+        return _decode_json_bytes(self.raw(n))
+
+    def items(self, start: int, stop: int) -> list[Any]:
+        """Decoded records start..stop-1 (fewer at the end of the array), in one json.loads."""
+        if stop > 0:
+            self._ensure(stop - 1)
+        stop = min(stop, len(self._starts))
+        if start >= stop:
+            return []
+        self._check_unchanged()
+        text = self._map[self._starts[start]:self._ends[stop - 1]]
+        try:
+            with profiling.stage("load.json_decode"):
+                return _decode_json_bytes(b"[" + text + b"]")
+        except ValueError:
+            pass
+        # Ищем запись с ошибкой, чтобы назвать ее номер
+        for n in range(start, stop):
+            try:
+                self.item(n)
+            except ValueError as e:
+                raise ValueError(f"запись #{n + 1}: {e}") from None
+        raise ValueError(f"некорректный текст между записями #{start + 1} и #{stop}")
+
+    def release(self, stop: int) -> None:
+        """
+        Drops the mapped pages of records before `stop` from the process
+        memory (MADV_DONTNEED). They stay in the page cache, so a later
+        access to those records still works, it just maps them again.
+        """
+        if not isinstance(self._map, mmap.mmap) or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        if stop <= 0:
+            return
+        end = self._starts[stop] if stop < len(self._starts) else self._ends[len(self._starts) - 1]
+        end -= end % mmap.PAGESIZE
+        if end > self._released:
+            self._map.madvise(mmap.MADV_DONTNEED, self._released, end - self._released)
+            self._released = end
+
+    def record(self, n: int, validation: str = "full") -> Apartment | str:
+        """Record n validated at the given level: an Apartment or an error message."""
+        check_validation(validation)
+        return _RECORD_VALIDATORS[validation](n + 1, self.item(n))
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> MappedListing:
+        return self
 
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _decode_json_bytes(raw: bytes) -> Any:
+    text = raw.decode("utf-8")
+    if "/" in text:
+        text = _strip_json_comments(text)
+    return json.loads(text)
+
+
+def _iter_mapped_batches(
+    listing: MappedListing, failure: list[RecordError]
+) -> Iterator[tuple[int, list[Any]]]:
+    """_iter_raw_batches for a MappedListing: batches are decoded one at a time."""
+    start = 0
+    while True:
+        try:
+            batch = listing.items(start, start + VALIDATE_BATCH_SIZE)
+        except UnicodeDecodeError as e:
+            failure.append(RecordError(0, f"Ошибка чтения файла: {e}"))
+            return
+        except ValueError as e:
+            failure.append(RecordError(0, f"Ошибка парсинга JSON: {e}"))
+            return
+        if batch:
+            # Разобранная часть файла больше не нужна: без этого все страницы
+            # файла остаются в памяти процесса до конца чтения
+            listing.release(start + len(batch))
+            yield start + 1, batch
+            start += len(batch)
+        if len(batch) < VALIDATE_BATCH_SIZE:
+            return
+
+
+def iter_mapped_apartments(
+    json_path: str, workers: int | None = None, validation: str = "full"
+) -> Iterator[Apartment | RecordError]:
+    """
+    iter_apartments over a MappedListing: same records, same RecordError
+    contract, but the file is read through mmap instead of text chunks.
+    Only for files that are replaced (rename), not rewritten in place,
+    while they are read (see MappedListing).
+    """
+    check_validation(validation)
+    try:
+        listing = MappedListing(json_path)
+    except _NotAList:
+        yield RecordError(0, "Ошибка: 'apartments' не является списком")
+        return
+    except (OSError, UnicodeDecodeError) as e:
+        yield RecordError(0, f"Ошибка чтения файла: {e}")
+        return
+    except ValueError as e:
+        yield RecordError(0, f"Ошибка парсинга JSON: {e}")
+        return
+
+    with listing:
+        failure: list[RecordError] = []
+        batches = _iter_mapped_batches(listing, failure)
+        for idx, results in _validated_batches(batches, workers, validation):
+            for result in results:
+                yield RecordError(idx, result) if isinstance(result, str) else result
+                idx += 1
+        yield from failure
+
+
+# ---------------------------------------------------------------------------
+# Базы из нескольких файлов (шардов)
+# ---------------------------------------------------------------------------
+
+SHARD_SUFFIX = ".json"  # из каталога и шаблона берутся только такие файлы
+SHARD_PATTERN = "*" + SHARD_SUFFIX  # файлы шардов внутри каталога
+SHARD_THREADS = 8  # потоков загрузки шардов без workers
+
+_T = TypeVar("_T")
+
+
+def shard_paths(source: str) -> list[str]:
+    """
+    Files behind a data source, sorted by name: the *.json files of a
+    directory, the *.json matches of a glob pattern, or the file itself.
+    Files written next to the shards (caches *.aptcache, *.tmp) are never
+    taken for shards.
+    """
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(glob.escape(source), SHARD_PATTERN)))
+    if any(c in source for c in "*?["):
+        return sorted(
+            p for p in glob.glob(source) if p.lower().endswith(SHARD_SUFFIX) and os.path.isfile(p)
+        )
+    return [source]
+
+
+def map_shards(fn: Callable[[str], _T], paths: list[str], workers: int | None = None) -> list[_T]:
+    """
+    fn(path) for every shard, concurrently; results are in the order of paths.
+    workers > 1 — a process pool (fn must be picklable), otherwise threads:
+    they overlap file reads and hashing, which release the GIL.
+    """
+    if len(paths) <= 1:
+        return [fn(p) for p in paths]
+    executor: Executor
+    if workers and workers > 1:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(paths)))
+    else:
+        executor = ThreadPoolExecutor(max_workers=min(SHARD_THREADS, len(paths)))
+    with executor, profiling.stage("load.shards"):
+        return list(executor.map(fn, paths))
+
+
+def shard_error(path: str, message: str) -> str:
+    """Error message of one shard, prefixed with its file name."""
+    return f"{os.path.basename(path)}: {message}"
+
+
+def _read_shards(
+    source: str, paths: list[str], stream: bool, workers: int | None, validation: str, mapped: bool
+) -> tuple[list[Apartment], int, list[str]]:
+    if not paths:
+        return [], 0, [f"Ошибка чтения файла: нет файлов базы по пути {source!r}"]
+
+    valid_apartments: list[Apartment] = []
+    invalid_count = 0
+    error_messages: list[str] = []
+    # Внутри шарда проверка идет в одном процессе: параллельны сами шарды
+    for path, (apartments, invalid, errors) in zip(
+        paths,
+        map_shards(
+            partial(read_apartments, stream=stream, validation=validation, mapped=mapped), paths, workers
+        ),
+    ):
+        valid_apartments.extend(apartments)
+        invalid_count += invalid
+        error_messages.extend(shard_error(path, e) for e in errors)
     return valid_apartments, invalid_count, error_messages
 
 
+def _iter_loaded_apartments(
+    json_path: str, workers: int | None = None, validation: str = "full"
+) -> Iterator[Apartment | RecordError]:
+    """iter_apartments over the whole file read and parsed at once."""
+    try:
+        with profiling.stage("load.read"), open(json_path, "r", encoding="utf-8") as f:
+            raw = f.read()
+    except Exception as e:
+        yield RecordError(0, f"Ошибка чтения файла: {e}")
+        return
+
+    try:
+        with profiling.stage("load.strip_comments"):
+            raw = _strip_json_comments(raw)
+        with profiling.stage("load.json_decode"):
+            data = json.loads(raw)
+    except Exception as e:
+        yield RecordError(0, f"Ошибка парсинга JSON: {e}")
+        return
+    del raw
+
+    items = data.get("apartments", []) if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        yield RecordError(0, "Ошибка: 'apartments' не является списком")
+        return
+
+    batches = (
+        (start + 1, items[start:start + VALIDATE_BATCH_SIZE])
+        for start in range(0, len(items), VALIDATE_BATCH_SIZE)
+    )
+    for idx, results in _validated_batches(batches, workers, validation):
+        for result in results:
+            yield RecordError(idx, result) if isinstance(result, str) else result
+            idx += 1
+
+
+def read_apartments(
+    json_path: str,
+    stream: bool = False,
+    workers: int | None = None,
+    validation: str = "full",
+    mapped: bool = False,
+) -> tuple[list[Apartment], int, list[str]]:
+    """
+    Reads apartments from aprtment.json and returns normalized records.
+    Returns: (valid_apartments, invalid_count, error_messages)
+    By default the file is read and parsed whole; stream=True reads it in
+    text chunks through iter_apartments, mapped=True maps it into memory
+    (iter_mapped_apartments) — only for files that are replaced, not
+    rewritten in place, while they are read.
+    workers > 1 validates the records in a process pool; record numbers in
+    error_messages and the order of valid records are the same as without it.
+    json_path may also be a directory or a glob of shard files (see
+    shard_paths): shards are read concurrently (map_shards), records are
+    concatenated in file name order, errors are prefixed with the file name.
+    validation: "full" (all checks), "fast" (stop at the first error of a
+    record, keep only the first ERROR_MESSAGES_KEPT messages) or "trusted"
+    (no checks); invalid_count is exact at every level.
+    """
+    check_validation(validation)
+    paths = shard_paths(json_path)
+    if paths != [json_path]:
+        return _read_shards(json_path, paths, stream, workers, validation, mapped)
+
+    if mapped:
+        records = iter_mapped_apartments(json_path, workers, validation)
+    elif stream:
+        records = iter_apartments(json_path, workers=workers, validation=validation)
+    else:
+        records = _iter_loaded_apartments(json_path, workers, validation)
+    valid_apartments: list[Apartment] = []
+    collected = collect_records(records, valid_apartments.append, error_messages_limit(validation))
+    if isinstance(collected, str):
+        # Как и при разборе файла целиком, частичные данные не отдаются
+        return [], 0, [collected]
+    invalid_count, error_messages = collected
+    return valid_apartments, invalid_count, error_messages
+
+
+def collect_records(
+    records: Iterable[Apartment | RecordError],
+    sink: Callable[[Apartment], Any],
+    keep: int | None = None,
+) -> tuple[int, list[str]] | str:
+    """
+    Passes the valid records to sink and counts the invalid ones.
+    keep — how many record error messages to keep (None — all).
+    Returns (invalid_count, error_messages), or the message of a file-level
+    error: the caller then discards everything sink has received.
+    """
+    invalid_count = 0
+    error_messages: list[str] = []
+
+    for rec in records:
+        if isinstance(rec, RecordError):
+            if not rec.index:
+                return rec.message
+            invalid_count += 1
+            if keep is None or len(error_messages) < keep:
+                error_messages.append(rec.message)
+        else:
+            sink(rec)
+
+    return invalid_count, error_messages
@@ -0,0 +1,269 @@
+"""
+Двоичный кэш разобранных квартир рядом с исходным файлом (<файл>.aptcache).
+
+Кэш хранит столбцы ApartmentTable, пулы строк, invalid_count и
+error_messages. Ключ кэша — путь, mtime, размер и хэш содержимого
+исходного файла: если хоть что-то изменилось, кэш пересобирается.
+
+Формат (все числа little-endian, каждый раздел выровнен на 8 байт, поэтому
+файл можно отобразить в память и читать столбцы через memoryview.cast):
+    заголовок _HEADER
+    путь к исходному файлу (UTF-8)
+    6 столбцов int64 (INT_COLUMNS), 4 столбца uint32 с кодами строк
+    3 пула строк и список ошибок: смещения uint64 + тело UTF-8
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from functools import partial
+from typing import NamedTuple
+
+import profiling
+from apartment_table import (
+    INT_COLUMNS,
+    STRING_COLUMNS,
+    ApartmentTable,
+    StringPool,
+    concat_shards,
+    read_apartment_table,
+)
+from json_reader import check_validation, map_shards, shard_paths
+
+CACHE_SUFFIX = ".aptcache"
+CACHE_MAGIC = b"APTCACHE"
+CACHE_VERSION = 1
+
+# magic, версия, длина пути, mtime_ns, размер, число строк, invalid_count, хэш
+_HEADER = struct.Struct("<8sIIqqQQ32s")
+_LEN = struct.Struct("<Q")
+CODE_COLUMNS = ("street_codes", "house_codes", "apartment_codes", "owner_codes")
+POOLS = ("streets", "numbers", "owners")
+_HASH_CHUNK = 1 << 20
+
+
+class Fingerprint(NamedTuple):
+    path: str
+    mtime_ns: int
+    size: int
+    digest: bytes  # blake2b-256 содержимого
+
+
+def cache_path_for(json_path: str, validation: str = "full") -> str:
+    """Cache file next to json_path; levels other than "full" get their own file."""
+    if validation == "full":
+        return json_path + CACHE_SUFFIX
+    return f"{json_path}.{validation}{CACHE_SUFFIX}"
+
+
+def file_fingerprint(json_path: str) -> Fingerprint:
+    st = os.stat(json_path)
+    h = hashlib.blake2b(digest_size=32)
+    with open(json_path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            h.update(chunk)
+    return Fingerprint(os.path.abspath(json_path), st.st_mtime_ns, st.st_size, h.digest())
+
+
+# ---------------------------------------------------------------------------
+# Запись
+# ---------------------------------------------------------------------------
+
+def pad8(n: int) -> bytes:
+    return b"\0" * (-n % 8)
+
+
+def le_bytes(col: array) -> bytes:
+    if sys.byteorder == "big":
+        col = array(col.typecode, col)
+        col.byteswap()
+    return col.tobytes()
+
+
+def pack_strings(strings: list[str]) -> bytes:
+    """Length-prefixed section: uint64 count, uint64 offsets, UTF-8 body."""
+    body = bytearray()
+    offsets = array("Q", [0])
+    for s in strings:
+        body += s.encode("utf-8", "surrogatepass")
+        offsets.append(len(body))
+    data = _LEN.pack(len(strings)) + le_bytes(offsets) + bytes(body)
+    return data + pad8(len(data))
+
+
+def write_cache(
+    cache_path: str,
+    fp: Fingerprint,
+    table: ApartmentTable,
+    invalid_count: int,
+    error_messages: list[str],
+) -> None:
+    """Writes the cache atomically (temporary file + os.replace)."""
+    path_bytes = fp.path.encode("utf-8", "surrogatepass")
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(
+                CACHE_MAGIC, CACHE_VERSION, len(path_bytes), fp.mtime_ns, fp.size,
+                len(table), invalid_count, fp.digest,
+            ))
+            f.write(path_bytes + pad8(len(path_bytes)))
+            for name in INT_COLUMNS + CODE_COLUMNS:
+                data = le_bytes(getattr(table, name))
+                f.write(data + pad8(len(data)))
+            for name in POOLS:
+                f.write(pack_strings(list(getattr(table, name))))
+            f.write(pack_strings(error_messages))
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# ---------------------------------------------------------------------------
+# Чтение
+# ---------------------------------------------------------------------------
+
+class SectionReader:
+    """Reads the 8-byte aligned sections written by le_bytes / pack_strings."""
+
+    __slots__ = ("view", "pos")
+
+    def __init__(self, view: memoryview, pos: int) -> None:
+        self.view = view
+        self.pos = pos
+
+    def take(self, n: int) -> memoryview:
+        if self.pos + n > len(self.view):
+            raise ValueError("файл обрезан")
+        part = self.view[self.pos:self.pos + n]
+        self.pos += n + (-n % 8)
+        return part
+
+    def column(self, typecode: str, count: int) -> array:
+        col = array(typecode)
+        col.frombytes(self.take(count * col.itemsize))
+        if sys.byteorder == "big":
+            col.byteswap()
+        return col
+
+    def strings(self) -> list[str]:
+        start = self.pos
+        (count,) = _LEN.unpack_from(self.view, start)
+        offsets = array("Q")
+        off_start = start + _LEN.size
+        off_end = off_start + (count + 1) * offsets.itemsize
+        offsets.frombytes(self.view[off_start:off_end])
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        if len(offsets) != count + 1 or off_end + offsets[-1] > len(self.view):
+            raise ValueError("файл обрезан")
+        body = bytes(self.view[off_end:off_end + offsets[-1]])
+        size = off_end + offsets[-1] - start
+        self.pos = start + size + (-size % 8)
+        return [
+            body[offsets[k]:offsets[k + 1]].decode("utf-8", "surrogatepass")
+            for k in range(count)
+        ]
+
+
+def read_cache(
+    cache_path: str, fp: Fingerprint
+) -> tuple[ApartmentTable, int, list[str]] | None:
+    """Loads the cache if it matches the fingerprint, otherwise returns None."""
+    try:
+        f = open(cache_path, "rb")
+    except OSError:
+        return None
+
+    with f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # пустой файл не отображается
+            return None
+        view = memoryview(mm)
+        try:
+            if len(view) < _HEADER.size:
+                return None
+            magic, version, path_len, mtime_ns, size, rows, invalid_count, digest = (
+                _HEADER.unpack_from(view, 0)
+            )
+            if magic != CACHE_MAGIC or version != CACHE_VERSION:
+                return None
+            reader = SectionReader(view, _HEADER.size)
+            path = bytes(reader.take(path_len)).decode("utf-8", "surrogatepass")
+            if Fingerprint(path, mtime_ns, size, digest) != fp:
+                return None
+
+            table = ApartmentTable()
+            for name in INT_COLUMNS:
+                setattr(table, name, reader.column("q", rows))
+            for name in CODE_COLUMNS:
+                setattr(table, name, reader.column("I", rows))
+            for name in POOLS:
+                setattr(table, name, StringPool.from_strings(reader.strings()))
+            for codes, pool in STRING_COLUMNS.values():
+                col = getattr(table, codes)
+                if rows and max(col) >= len(getattr(table, pool)):
+                    raise ValueError("код строки вне пула")
+            error_messages = reader.strings()
+            return table, invalid_count, error_messages
+        except (ValueError, struct.error, UnicodeDecodeError):
+            return None  # поврежденный кэш — будет пересобран
+        finally:
+            view.release()
+            mm.close()
+
+
+def load_cached_table(
+    json_path: str,
+    cache_path: str | None = None,
+    workers: int | None = None,
+    validation: str = "full",
+) -> tuple[ApartmentTable, int, list[str]]:
+    """
+    read_apartment_table with a persistent cache: a warm start loads the
+    cache, a changed (or missing) source file is re-parsed (with `workers`
+    processes) and the cache is rebuilt.
+    A directory or glob of shards (json_reader.shard_paths) is loaded shard by
+    shard, concurrently, each with its own cache file; cache_path is ignored.
+    Every validation level is cached in its own file (cache_path_for).
+    Returns: (table, invalid_count, error_messages)
+    """
+    check_validation(validation)
+    paths = shard_paths(json_path)
+    if paths != [json_path]:
+        load_shard = partial(load_cached_table, validation=validation)
+        return concat_shards(json_path, paths, map_shards(load_shard, paths, workers))
+
+    if cache_path is None:
+        cache_path = cache_path_for(json_path, validation)
+
+    try:
+        with profiling.stage("cache.fingerprint"):
+            fp = file_fingerprint(json_path)
+    except OSError:
+        # ошибку чтения сообщит загрузчик
+        return read_apartment_table(json_path, workers, validation)
+
+    with profiling.stage("cache.read"):
+        cached = read_cache(cache_path, fp)
+    if cached is not None:
+        return cached
+
+    table, invalid_count, error_messages = read_apartment_table(json_path, workers, validation)
+    # Пустая таблица с сообщением без некорректных записей — ошибка уровня файла,
+    # такой результат не кэшируется
+    file_error = not len(table) and not invalid_count and error_messages
+    if not file_error:
+        try:
+            with profiling.stage("cache.write"):
+                write_cache(cache_path, fp, table, invalid_count, error_messages)
+        except OSError:
+            pass  # каталог только для чтения — работаем без кэша
+    return table, invalid_count, error_messages
@@ -0,0 +1,320 @@
+"""
+Выгрузка проверенных квартир в компактные форматы и быстрая загрузка из них.
+
+Формат выбирается по расширению файла:
+    .aptcol — двоичный столбцовый. Записи идут блоками по EXPORT_BLOCK_ROWS
+        строк: в блоке 6 числовых столбцов (INT_COLUMNS) и 4 столбца кодов
+        строк — каждый самым узким целым типом, в который помещаются его
+        значения в этом блоке, — а также строки словарей (улицы, номера,
+        фамилии), впервые встретившиеся в этом блоке. Поэтому ни запись, ни чтение не
+        держат в памяти всю выгрузку — только блок и словари. Файл
+        завершается записью END с общим числом строк: обрезанный файл
+        не будет принят за целый.
+    .csv — текст, столбцы RECORD_FIELDS, числа без единиц измерения.
+
+В выгрузку попадают только проверенные записи, поэтому загрузчики не
+повторяют проверки json_reader: в CSV проверяется только то, что числа —
+целые. Загрузчики возвращают то же, что read_apartments и
+read_apartment_table: (записи или таблица, invalid_count, error_messages).
+
+    python index.py --export aprtment.aptcol      # выгрузка после проверки
+    python index.py --data aprtment.aptcol        # быстрый старт из выгрузки
+"""
+
+from __future__ import annotations
+
+import csv
+import mmap
+import os
+import struct
+from array import array
+from typing import BinaryIO, Iterable, Iterator
+
+import profiling
+from apartment_table import INT_COLUMNS, ApartmentTable
+from json_reader import MAX_FIELD_VALUE, Address, Apartment, RecordError, collect_records
+from listing_cache import CODE_COLUMNS, POOLS, SectionReader, le_bytes, pack_strings, pad8
+
+COLUMNAR_SUFFIX = ".aptcol"
+CSV_SUFFIX = ".csv"
+EXPORT_SUFFIXES = (COLUMNAR_SUFFIX, CSV_SUFFIX)
+EXPORT_BLOCK_ROWS = 1 << 16  # строк в блоке .aptcol
+
+COLUMNAR_MAGIC = b"APTCOLS\0"
+COLUMNAR_VERSION = 1
+
+# magic, версия
+_FILE_HEADER = struct.Struct("<8sI4x")
+# метка блока, строк в блоке, всего строк (только в END)
+_BLOCK_HEADER = struct.Struct("<4sIQ")
+_ROWS_TAG = b"ROWS"
+_END_TAG = b"END\0"
+# Типы array для столбцов блока, от узкого к широкому
+_SIGNED_TYPES = "bhiq"
+_UNSIGNED_TYPES = "BHI"
+
+RECORD_FIELDS = (
+    "street", "house", "apartment", "rooms", "total_area", "living_area",
+    "floor", "total_floors", "owner_last_name", "price",
+)
+
+
+def record_fields(a: Apartment) -> list:
+    return [
+        a.address.street, a.address.house, a.address.apartment, a.rooms, a.total_area,
+        a.living_area, a.floor, a.total_floors, a.owner_last_name, a.price,
+    ]
+
+
+def _narrowest_type(col: array, typecodes: str) -> str:
+    """Narrowest array typecode from typecodes that holds every value of col."""
+    if not len(col):
+        return typecodes[0]
+    lo, hi = min(col), max(col)
+    for tc in typecodes:
+        bits = 8 * array(tc).itemsize
+        if tc.islower():
+            if -(1 << (bits - 1)) <= lo and hi < 1 << (bits - 1):
+                return tc
+        elif hi < 1 << bits:
+            return tc
+    return typecodes[-1]
+
+
+def is_export_path(path: str) -> bool:
+    """True for files in one of the export formats (by extension)."""
+    return path.lower().endswith(EXPORT_SUFFIXES)
+
+
+# ---------------------------------------------------------------------------
+# Запись
+# ---------------------------------------------------------------------------
+
+class ColumnarWriter:
+    """
+    Streaming writer of the .aptcol format: rows are collected into an
+    ApartmentTable of one block, the string pools are shared by all blocks.
+    """
+
+    __slots__ = ("_f", "_block", "_pools", "_sent", "rows")
+
+    def __init__(self, f: BinaryIO) -> None:
+        self._f = f
+        self._pools = ApartmentTable()  # только пулы строк, общие для всех блоков
+        self._sent = [0] * len(POOLS)  # сколько строк каждого пула уже записано
+        self._block = self._new_block()
+        self.rows = 0
+        f.write(_FILE_HEADER.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION))
+
+    def _new_block(self) -> ApartmentTable:
+        block = ApartmentTable()
+        for name in POOLS:
+            setattr(block, name, getattr(self._pools, name))
+        return block
+
+    def write(self, a: Apartment) -> None:
+        self._block.append(a)
+        if len(self._block) == EXPORT_BLOCK_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        block = self._block
+        if not len(block):
+            return
+        f = self._f
+        f.write(_BLOCK_HEADER.pack(_ROWS_TAG, len(block), 0))
+        columns = [getattr(block, name) for name in INT_COLUMNS + CODE_COLUMNS]
+        types = [_narrowest_type(col, _SIGNED_TYPES if col.typecode == "q" else _UNSIGNED_TYPES) for col in columns]
+        f.write(pack_strings(["".join(types)]))
+        for col, tc in zip(columns, types):
+            data = le_bytes(col if tc == col.typecode else array(tc, col))
+            f.write(data + pad8(len(data)))
+        for k, name in enumerate(POOLS):
+            pool = getattr(block, name)
+            f.write(pack_strings(pool.strings_from(self._sent[k])))
+            self._sent[k] = len(pool)
+        self.rows += len(block)
+        self._block = self._new_block()
+
+    def close(self) -> None:
+        """Writes the last block and the END record (the file itself stays open)."""
+        self._flush()
+        self._f.write(_BLOCK_HEADER.pack(_END_TAG, 0, self.rows))
+
+
+def _export_columnar(records: Iterable[Apartment], path: str) -> int:
+    with open(path, "wb") as f:
+        writer = ColumnarWriter(f)
+        for a in records:
+            writer.write(a)
+        writer.close()
+    return writer.rows
+
+
+def _export_csv(records: Iterable[Apartment], path: str) -> int:
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(RECORD_FIELDS)
+        for a in records:
+            writer.writerow(record_fields(a))
+            rows += 1
+    return rows
+
+
+def export_apartments(records: Iterable[Apartment], path: str) -> int:
+    """
+    Writes the records to path in the format of its extension (.aptcol or
+    .csv); records are consumed lazily. The file is replaced atomically.
+    Returns the number of written records.
+    """
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == COLUMNAR_SUFFIX:
+        export = _export_columnar
+    elif suffix == CSV_SUFFIX:
+        export = _export_csv
+    else:
+        raise ValueError(f"неизвестный формат выгрузки {suffix!r} (допустимы: {', '.join(EXPORT_SUFFIXES)})")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with profiling.stage("export.write"):
+            rows = export(records, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    profiling.count("export.rows", rows)
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Чтение
+# ---------------------------------------------------------------------------
+
+def _read_columnar(path: str) -> ApartmentTable:
+    """Loads a .aptcol file into a table; ValueError if the file is damaged."""
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            raise ValueError("пустой файл")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            if len(view) < _FILE_HEADER.size:
+                raise ValueError("файл обрезан")
+            magic, version = _FILE_HEADER.unpack_from(view, 0)
+            if magic != COLUMNAR_MAGIC or version != COLUMNAR_VERSION:
+                raise ValueError("не файл выгрузки .aptcol или неизвестная версия формата")
+
+            table = ApartmentTable()
+            reader = SectionReader(view, _FILE_HEADER.size)
+            while True:
+                tag, rows, total = _BLOCK_HEADER.unpack(bytes(reader.take(_BLOCK_HEADER.size)))
+                if tag == _END_TAG:
+                    break
+                if tag != _ROWS_TAG:
+                    raise ValueError("поврежден заголовок блока")
+                (types,) = reader.strings()
+                names = INT_COLUMNS + CODE_COLUMNS
+                if len(types) != len(names):
+                    raise ValueError("поврежден список типов столбцов")
+                for name, tc in zip(names, types):
+                    target = getattr(table, name)
+                    allowed = _SIGNED_TYPES if target.typecode == "q" else _UNSIGNED_TYPES
+                    if tc not in allowed:
+                        raise ValueError(f"недопустимый тип столбца {tc!r}")
+                    part = reader.column(tc, rows)
+                    if tc == target.typecode:
+                        target.extend(part)
+                    else:
+                        target.fromlist(part.tolist())  # быстрее, чем array(typecode, part)
+                for name in POOLS:
+                    pool = getattr(table, name)
+                    strings = reader.strings()
+                    expected = len(pool) + len(strings)
+                    for s in strings:
+                        pool.code(s)
+                    if len(pool) != expected:
+                        raise ValueError("повтор строки в словаре")
+
+    if total != len(table):
+        raise ValueError(f"в файле {len(table)} записей, ожидалось {total}")
+    for name, pool in zip(CODE_COLUMNS, ("streets", "numbers", "numbers", "owners")):
+        codes = getattr(table, name)
+        if len(codes) and max(codes) >= len(getattr(table, pool)):
+            raise ValueError("код строки вне словаря")
+    return table
+
+
+def _iter_csv(path: str) -> Iterator[Apartment | RecordError]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = csv.reader(f)
+        header = next(rows, None)
+        if header is None or tuple(header) != RECORD_FIELDS:
+            yield RecordError(0, f"Ошибка чтения файла: ожидался заголовок CSV {','.join(RECORD_FIELDS)}")
+            return
+        for idx, row in enumerate(rows, 1):
+            if len(row) != len(RECORD_FIELDS):
+                yield RecordError(idx, f"Запись #{idx}: ожидалось {len(RECORD_FIELDS)} столбцов, получено {len(row)}")
+                continue
+            street, house, apartment, *numbers, owner, price = row
+            try:
+                rooms, total_area, living_area, floor, total_floors, price_value = map(int, (*numbers, price))
+            except ValueError:
+                yield RecordError(idx, f"Запись #{idx} ({street}, д. {house}, кв. {apartment}): числа должны быть целыми")
+                continue
+            values = (rooms, total_area, living_area, floor, total_floors, price_value)
+            if any(abs(v) > MAX_FIELD_VALUE for v in values):
+                yield RecordError(idx, f"Запись #{idx} ({street}, д. {house}, кв. {apartment}): число вне диапазона int64")
+                continue
+            yield Apartment(
+                Address(street, house, apartment),
+                rooms, total_area, living_area, floor, total_floors, owner, price_value,
+            )
+
+
+def iter_export(path: str) -> Iterator[Apartment | RecordError]:
+    """
+    Records of an export file one by one, like json_reader.iter_apartments:
+    a file-level error is a RecordError with index 0 and ends the stream.
+    """
+    if not path.lower().endswith(COLUMNAR_SUFFIX):
+        try:
+            yield from _iter_csv(path)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            yield RecordError(0, f"Ошибка чтения файла: {e}")
+        return
+    table, _, errors = read_export_table(path)
+    if errors:
+        yield RecordError(0, errors[0])
+        return
+    yield from table.rows()
+
+
+def read_export_table(path: str) -> tuple[ApartmentTable, int, list[str]]:
+    """
+    read_apartment_table for an export file: .aptcol columns are copied into
+    the table block by block, without building Apartment objects.
+    Returns: (table, invalid_count, error_messages)
+    """
+    if not path.lower().endswith(COLUMNAR_SUFFIX):
+        table = ApartmentTable()
+        with profiling.stage("load.export"):
+            collected = collect_records(iter_export(path), table.append)
+        if isinstance(collected, str):
+            return ApartmentTable(), 0, [collected]
+        invalid_count, error_messages = collected
+        return table, invalid_count, error_messages
+
+    try:
+        with profiling.stage("load.export"):
+            return _read_columnar(path), 0, []
+    except (OSError, ValueError, struct.error, UnicodeDecodeError) as e:
+        return ApartmentTable(), 0, [f"Ошибка чтения файла: {e}"]
+
+
+def read_export(path: str) -> tuple[list[Apartment], int, list[str]]:
+    """
+    read_apartments for an export file.
+    Returns: (valid_apartments, invalid_count, error_messages)
+    """
+    table, invalid_count, error_messages = read_export_table(path)
+    return list(table.rows()), invalid_count, error_messages
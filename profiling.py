@@ -0,0 +1,119 @@
+"""
+Инструментирование горячих путей: таймеры этапов и счетчики.
+
+Включается переменной окружения APT_PROFILE или флагами index.py:
+    APT_PROFILE=1               (--profile)           — сводка по этапам в stderr при выходе
+    APT_PROFILE=stats.pstats    (--profile-out FILE)  — сводка + cProfile в файл pstats
+
+Пока профилирование выключено, stage() возвращает общий пустой контекст,
+а в горячих циклах счетчики не трогаются вовсе: места вызова проверяют
+ENABLED и выбирают неинструментированный вариант кода.
+"""
+
+from __future__ import annotations
+
+import atexit
+import cProfile
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import TextIO
+
+ENV_VAR = "APT_PROFILE"
+
+ENABLED = False
+
+_times: defaultdict[str, float] = defaultdict(float)
+_calls: defaultdict[str, int] = defaultdict(int)
+_counters: defaultdict[str, int] = defaultdict(int)
+_profiler: cProfile.Profile | None = None
+_pstats_path: str | None = None
+
+
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> None:
+        _times[self.name] += time.perf_counter() - self.t0
+        _calls[self.name] += 1
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str) -> _Stage | _NullStage:
+    """Timer of a stage: `with profiling.stage("load.read"): ...` (inclusive time)."""
+    return _Stage(name) if ENABLED else _NULL_STAGE
+
+
+def count(name: str, n: int = 1) -> None:
+    if ENABLED:
+        _counters[name] += n
+
+
+def enable(pstats_path: str | None = None) -> None:
+    """Turns instrumentation on; the report is written to stderr at exit."""
+    global ENABLED, _profiler, _pstats_path
+    if not ENABLED:
+        atexit.register(_finish)
+    ENABLED = True
+    if pstats_path and _profiler is None:
+        _pstats_path = pstats_path
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def reset() -> None:
+    _times.clear()
+    _calls.clear()
+    _counters.clear()
+
+
+def report() -> str:
+    lines = [f"{'этап':<28} {'вызовов':>9} {'время, с':>11}"]
+    for name in sorted(_times):
+        lines.append(f"{name:<28} {_calls[name]:>9} {_times[name]:>11.4f}")
+    if _counters:
+        lines.append("")
+        lines.append(f"{'счетчик':<28} {'значение':>21}")
+        for name in sorted(_counters):
+            lines.append(f"{name:<28} {_counters[name]:>21}")
+    return "\n".join(lines)
+
+
+def _finish(out: TextIO | None = None) -> None:
+    global _profiler
+    out = out if out is not None else sys.stderr
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(_pstats_path)
+        _profiler = None
+        print(f"cProfile: статистика записана в {_pstats_path}", file=out)
+    print("\n=== Профиль ===\n" + report(), file=out)
+
+
+def _configure_from_env() -> None:
+    value = os.environ.get(ENV_VAR, "").strip()
+    if not value or value == "0":
+        return
+    enable(None if value == "1" else value)
+
+
+_configure_from_env()
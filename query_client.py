@@ -0,0 +1,149 @@
+"""
+Клиент сервера запросов (query_server.py).
+
+Одно соединение открывается при первом запросе и переиспользуется для всех
+следующих, поэтому запрос стоит один обмен строками по сокету, а не запуск
+index.py с загрузкой базы. Если сервер закрыл соединение (перезапуск,
+простой), запрос один раз повторяется на новом соединении.
+
+    with QueryClient("127.0.0.1:8765") as client:
+        result = client.price(4_000_000, 9_000_000, limit=20)
+        for record in result.records():
+            print(record["street"], record["price"])
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+import threading
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Iterator
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+UNIX_PREFIX = "unix:"
+
+
+def parse_address(address: str) -> tuple[str, int] | str:
+    """'host:port' -> (host, port); 'unix:/path/to.sock' -> '/path/to.sock'."""
+    if address.startswith(UNIX_PREFIX):
+        return address[len(UNIX_PREFIX):]
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"адрес должен быть host:port или unix:/путь, получено {address!r}")
+    return host.strip("[]") or "127.0.0.1", int(port)
+
+
+@dataclass(slots=True, frozen=True)
+class QueryResult:
+    total: int  # записей, подходящих под запрос (без учета limit/offset)
+    fields: tuple[str, ...]
+    rows: list[list[Any]]
+
+    def records(self) -> Iterator[dict[str, Any]]:
+        """Rows as dicts field -> value."""
+        fields = self.fields
+        return (dict(zip(fields, row)) for row in self.rows)
+
+
+class QueryClient:
+    """Thread-safe client with one persistent connection."""
+
+    __slots__ = ("address", "timeout", "_sock", "_file", "_lock", "_next_id")
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float | None = 30.0) -> None:
+        self.address = address
+        self.timeout = timeout
+        self._sock: socket.socket | None = None
+        self._file: BinaryIO | None = None
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def _connect(self) -> None:
+        target = parse_address(self.address)
+        if isinstance(target, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET6 if ":" in target[0] else socket.AF_INET)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(target)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+
+    def _exchange(self, line: bytes) -> bytes:
+        assert self._file is not None
+        self._file.write(line)
+        self._file.flush()
+        reply = self._file.readline()
+        if not reply:
+            raise ConnectionResetError("сервер закрыл соединение")
+        return reply
+
+    def request(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Sends one request and returns the decoded response."""
+        with self._lock:
+            payload = {"id": self._next_id, **payload}
+            self._next_id += 1
+            line = json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n"
+
+            reused = self._file is not None
+            if not reused:
+                self._connect()
+            try:
+                reply = self._exchange(line)
+            except (ConnectionError, BrokenPipeError):
+                # Старое соединение могло быть закрыто сервером — одна повторная попытка
+                self._close()
+                if not reused:
+                    raise
+                self._connect()
+                reply = self._exchange(line)
+            except OSError:
+                self._close()
+                raise
+        return json.loads(reply)
+
+    def query(self, text: str, limit: int | None = None, offset: int = 0) -> QueryResult:
+        """Runs a query (all | rooms N | price N1 N2); server errors raise ValueError."""
+        response = self.request({"query": text, "limit": limit, "offset": offset})
+        if not response.get("ok"):
+            raise ValueError(response.get("error", "неизвестная ошибка сервера"))
+        return QueryResult(response["total"], tuple(response["fields"]), response["rows"])
+
+    def all(self, limit: int | None = None, offset: int = 0) -> QueryResult:
+        return self.query("all", limit, offset)
+
+    def rooms(self, rooms: int, limit: int | None = None, offset: int = 0) -> QueryResult:
+        return self.query(f"rooms {rooms}", limit, offset)
+
+    def price(self, n1: int, n2: int, limit: int | None = None, offset: int = 0) -> QueryResult:
+        return self.query(f"price {n1} {n2}", limit, offset)
+
+    def ping(self) -> bool:
+        return bool(self.request({"query": "ping"}).get("ok"))
+
+    def _close(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        if self._sock is not None:
+            self._sock.close()
+        self._file = None
+        self._sock = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def __enter__(self) -> QueryClient:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -0,0 +1,409 @@
+"""
+Движок запросов к ApartmentTable: фильтры по любым полям квартиры,
+составной ключ сортировки (по возрастанию / убыванию для каждого поля)
+и ограничение числа записей.
+
+    Query(
+        where=(
+            Equals("rooms", 2),
+            Range("price", hi=8_000_000),
+            Prefix("street", "улица"),
+            ColumnCompare("floor", "<", "total_floors"),
+        ),
+        order=(("price", False), ("total_area", True)),
+        limit=20,
+    )
+
+Планировщик (QueryEngine.plan) выбирает самый дешевый источник строк:
+    index:rooms / index:price — готовые списки ApartmentIndex (задачи 2 и 3);
+        если порядок запроса совпадает с порядком индекса, сортировка не нужна;
+    order — уже готовый полный порядок с тем же ключом (порядок задачи 3 из
+        индекса или вычисленный раньше и сохраненный движком): строки идут
+        по порядку с проверкой условий, с limit — только до первых N;
+    scan — проход по столбцам самым избирательным условием, остальные
+        условия проверяются на найденных строках, затем сортировка Шелла
+        (с limit — частичная, через кучу LazySortedIndices).
+Стоимость плана оценивается числом просматриваемых строк; для условий,
+которые обслуживает индекс, число строк известно точно.
+
+Равные по ключу строки, как и строки запроса без сортировки, идут в
+порядке строк таблицы. Задачи 1–3 index.py — готовые запросы
+task_all, task_rooms и task_price (PRESETS).
+"""
+
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass
+from itertools import compress
+from math import log2
+from typing import Callable, Iterator, Sequence, Union
+
+from apartment_index import ALL_ORDER, PRICE_ORDER, ROOMS_ORDER, ApartmentIndex
+from apartment_table import INT_COLUMNS, STRING_COLUMNS, ApartmentTable
+from json_reader import Apartment
+from sort_methods import LazySortedIndices, sort_indices, sort_sharded
+
+FIELDS = (*INT_COLUMNS, *STRING_COLUMNS)
+
+# Доля строк, которую оценочно пропускает условие без индекса
+DEFAULT_SELECTIVITY = 0.25
+
+_MIN_INT = -(1 << 63)
+_MAX_INT = (1 << 63) - 1
+
+_COMPARE_OPS: dict[str, Callable[[int, int], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    ">": operator.gt,
+}
+
+Order = tuple[tuple[str, bool], ...]
+
+
+def _check_field(name: str, fields: Sequence[str] = FIELDS) -> None:
+    if name not in fields:
+        raise ValueError(f"неизвестное поле {name!r} (допустимы: {', '.join(fields)})")
+
+
+def _scan_rows(table: ApartmentTable, mask: Iterator[bool]) -> list[int]:
+    return table.drop_deleted(list(compress(range(len(table)), mask)))
+
+
+# ---------------------------------------------------------------------------
+# Условия
+# ---------------------------------------------------------------------------
+
+@dataclass(slots=True, frozen=True)
+class Equals:
+    """field == value (числовое или строковое поле)."""
+
+    field: str
+    value: int | str
+
+    def __post_init__(self) -> None:
+        _check_field(self.field)
+        if isinstance(self.value, str) != (self.field in STRING_COLUMNS):
+            raise ValueError(f"поле {self.field!r} сравнивается с неподходящим значением {self.value!r}")
+
+    def scan(self, table: ApartmentTable) -> list[int]:
+        if self.field in INT_COLUMNS:
+            return table.indices_equal(self.field, self.value)
+        codes, pool = table.string_column(self.field)
+        code = pool.find(self.value)
+        return [] if code is None else _scan_rows(table, map(code.__eq__, codes))
+
+    def test(self, table: ApartmentTable) -> Callable[[int], bool]:
+        if self.field in INT_COLUMNS:
+            col, value = table.column(self.field), self.value
+            return lambda i: col[i] == value
+        codes, pool = table.string_column(self.field)
+        code = pool.find(self.value)
+        return lambda i: codes[i] == code
+
+
+@dataclass(slots=True, frozen=True)
+class Range:
+    """lo <= field <= hi для числового поля; None — граница не задана."""
+
+    field: str
+    lo: int | None = None
+    hi: int | None = None
+
+    def __post_init__(self) -> None:
+        _check_field(self.field, INT_COLUMNS)
+
+    @property
+    def bounds(self) -> tuple[int, int]:
+        return (
+            _MIN_INT if self.lo is None else self.lo,
+            _MAX_INT if self.hi is None else self.hi,
+        )
+
+    def scan(self, table: ApartmentTable) -> list[int]:
+        return table.indices_between(self.field, *self.bounds)
+
+    def test(self, table: ApartmentTable) -> Callable[[int], bool]:
+        col = table.column(self.field)
+        lo, hi = self.bounds
+        return lambda i: lo <= col[i] <= hi
+
+
+@dataclass(slots=True, frozen=True)
+class Prefix:
+    """Строковое поле начинается с prefix (например, улица)."""
+
+    field: str
+    prefix: str
+
+    def __post_init__(self) -> None:
+        _check_field(self.field, tuple(STRING_COLUMNS))
+
+    def _codes(self, table: ApartmentTable) -> tuple[Sequence[int], set[int]]:
+        codes, pool = table.string_column(self.field)
+        return codes, {c for c, s in enumerate(pool) if s.startswith(self.prefix)}
+
+    def scan(self, table: ApartmentTable) -> list[int]:
+        codes, matching = self._codes(table)
+        return _scan_rows(table, map(matching.__contains__, codes))
+
+    def test(self, table: ApartmentTable) -> Callable[[int], bool]:
+        codes, matching = self._codes(table)
+        return lambda i: codes[i] in matching
+
+
+@dataclass(slots=True, frozen=True)
+class ColumnCompare:
+    """Сравнение двух числовых полей одной записи, например floor < total_floors."""
+
+    left: str
+    op: str
+    right: str
+
+    def __post_init__(self) -> None:
+        _check_field(self.left, INT_COLUMNS)
+        _check_field(self.right, INT_COLUMNS)
+        if self.op not in _COMPARE_OPS:
+            raise ValueError(f"неизвестная операция {self.op!r} (допустимы: {' '.join(_COMPARE_OPS)})")
+
+    def scan(self, table: ApartmentTable) -> list[int]:
+        return _scan_rows(
+            table, map(_COMPARE_OPS[self.op], table.column(self.left), table.column(self.right))
+        )
+
+    def test(self, table: ApartmentTable) -> Callable[[int], bool]:
+        op = _COMPARE_OPS[self.op]
+        a, b = table.column(self.left), table.column(self.right)
+        return lambda i: op(a[i], b[i])
+
+
+Predicate = Union[Equals, Range, Prefix, ColumnCompare]
+
+
+@dataclass(slots=True, frozen=True)
+class Query:
+    where: tuple[Predicate, ...] = ()
+    order: Order = ()  # пары (поле, по убыванию)
+    limit: int | None = None
+
+    def __post_init__(self) -> None:
+        for name, _ in self.order:
+            _check_field(name)
+        if self.limit is not None and self.limit < 0:
+            raise ValueError("limit не может быть отрицательным")
+
+
+def task_all() -> Query:
+    """Задача 1: все квартиры, комнаты ↓, цена ↑."""
+    return Query(order=ALL_ORDER)
+
+
+def task_rooms(rooms: int) -> Query:
+    """Задача 2: заданное число комнат, этаж ↑, этажность ↑, цена ↓."""
+    return Query(where=(Equals("rooms", rooms),), order=ROOMS_ORDER)
+
+
+def task_price(n1: int, n2: int) -> Query:
+    """Задача 3: цена в [n1, n2], цена ↓, общая площадь ↑."""
+    return Query(where=(Range("price", n1, n2),), order=PRICE_ORDER)
+
+
+PRESETS: dict[str, Callable[..., Query]] = {
+    "all": task_all,
+    "rooms": task_rooms,
+    "price": task_price,
+}
+
+
+# ---------------------------------------------------------------------------
+# Планировщик
+# ---------------------------------------------------------------------------
+
+@dataclass(slots=True, frozen=True)
+class Plan:
+    source: str  # "index:rooms" | "index:price" | "order" | "scan"
+    cost: float  # оценка числа просматриваемых строк
+    sort: bool  # нужна ли сортировка найденных строк
+    access: Predicate | None = None  # условие, которым выбираются строки
+    residual: tuple[Predicate, ...] = ()  # проверяются на найденных строках
+
+    def describe(self) -> str:
+        parts = [self.source]
+        if self.access is not None:
+            parts.append(f"по {self.access}")
+        if self.residual:
+            parts.append("фильтр: " + ", ".join(map(str, self.residual)))
+        parts.append("сортировка" if self.sort else "без сортировки")
+        return f"{'; '.join(parts)} (оценка: {self.cost:.0f} строк)"
+
+
+def _sort_cost(rows: float, limit: int | None) -> float:
+    if limit is not None and limit < rows:
+        return rows + limit * log2(max(rows, 2))  # heapify + limit извлечений
+    return rows * log2(max(rows, 2))
+
+
+class QueryEngine:
+    """Plans and runs Query objects over a table and (optionally) its ApartmentIndex."""
+
+    __slots__ = ("table", "apt_index", "_orders")
+
+    def __init__(self, table: ApartmentTable, apt_index: ApartmentIndex | None = None) -> None:
+        self.table = table
+        self.apt_index = apt_index
+        self._orders: dict[Order, Sequence[int]] = {}  # полные порядки, вычисленные раньше
+
+    def invalidate(self) -> None:
+        """Drops the saved sort orders; call after the table has changed."""
+        self._orders.clear()
+
+    def _known_order(self, order: Order) -> Sequence[int] | None:
+        if order in self._orders:
+            return self._orders[order]
+        if order == PRICE_ORDER and self.apt_index is not None:
+            return self.apt_index.ordered_by_price()
+        return None
+
+    def _index_lookup(self, p: Predicate) -> tuple[str, Order, Sequence[int]] | None:
+        """(plan name, order of the rows, rows) if the index answers p directly."""
+        if self.apt_index is None:
+            return None
+        if isinstance(p, Equals) and p.field == "rooms":
+            return "index:rooms", ROOMS_ORDER, self.apt_index.rooms(p.value)
+        if isinstance(p, Equals) and p.field == "price":
+            return "index:price", PRICE_ORDER, self.apt_index.price_range(p.value, p.value)
+        if isinstance(p, Range) and p.field == "price":
+            return "index:price", PRICE_ORDER, self.apt_index.price_range(*p.bounds)
+        return None
+
+    def plan(self, query: Query) -> Plan:
+        n = self.table.live_count()
+        where = query.where
+        limit = query.limit
+
+        estimates: dict[int, float] = {}
+        lookups: dict[int, tuple[str, Order, Sequence[int]]] = {}
+        for k, p in enumerate(where):
+            lookup = self._index_lookup(p)
+            if lookup is not None:
+                lookups[k] = lookup
+                estimates[k] = len(lookup[2])
+            else:
+                estimates[k] = n * DEFAULT_SELECTIVITY
+        share = 1.0
+        for est in estimates.values():
+            share *= est / n if n else 0.0
+
+        found = n * share  # оценка числа строк результата
+        plans: list[Plan] = []
+        for k, (name, order, rows) in lookups.items():
+            residual = where[:k] + where[k + 1:]
+            needs_sort = query.order != order
+            cost = len(rows) * (1 + len(residual)) + (_sort_cost(found, limit) if needs_sort else 0)
+            plans.append(Plan(name, cost, needs_sort, where[k], residual))
+
+        if query.order and self._known_order(query.order) is not None:
+            cost = float(n * (1 + len(where)))
+            if limit is not None and where:
+                cost = min(cost, limit / max(share, 1 / max(n, 1)) * (1 + len(where)))
+            elif limit is not None:
+                cost = float(min(n, limit))
+            plans.append(Plan("order", cost, False, None, where))
+
+        access_k = min(estimates, key=estimates.__getitem__) if where else None
+        cost = float(n)
+        residual = where
+        access = None
+        if access_k is not None:
+            access = where[access_k]
+            residual = where[:access_k] + where[access_k + 1:]
+            cost += estimates[access_k] * len(residual)
+        if query.order:
+            cost += _sort_cost(found, limit)
+        plans.append(Plan("scan", cost, bool(query.order), access, residual))
+
+        # При равной оценке предпочтение — индексу, затем готовому порядку
+        return min(plans, key=lambda plan: plan.cost)
+
+    def run(self, query: Query, lazy: bool = False) -> Sequence[int]:
+        """
+        Номера строк результата в порядке запроса.
+        lazy=True (постраничный вывод) — сортировка без limit тоже выполняется
+        лениво: вычисляются только запрошенные первые строки.
+        """
+        plan = self.plan(query)
+        table = self.table
+        limit = query.limit
+        tests = [p.test(table) for p in plan.residual]
+
+        if plan.source == "order":
+            ordered = self._known_order(query.order)
+            assert ordered is not None
+            if not tests:
+                return ordered[:limit] if limit is not None else ordered
+            result: list[int] = []
+            for i in ordered:
+                if all(t(i) for t in tests):
+                    result.append(i)
+                    if limit is not None and len(result) >= limit:
+                        break
+            return result
+
+        rows: Sequence[int]
+        if plan.source.startswith("index:"):
+            assert plan.access is not None
+            lookup = self._index_lookup(plan.access)
+            assert lookup is not None
+            rows = lookup[2]
+            if plan.sort:
+                rows = sorted(rows)  # равные ключи — в порядке строк таблицы
+        elif plan.access is not None:
+            rows = plan.access.scan(table)
+        else:
+            rows = table.live_rows()
+        for t in tests:
+            rows = list(filter(t, rows))
+
+        if not plan.sort:
+            return rows[:limit] if limit is not None else rows
+        return self._sort(rows, query, lazy, full=not query.where)
+
+    def _sort(self, rows: Sequence[int], query: Query, lazy: bool, full: bool) -> Sequence[int]:
+        limit = query.limit
+        if not query.order:
+            return rows[:limit] if limit is not None else rows
+        columns = [self._sort_column(name) for name, _ in query.order]
+        descending = [desc for _, desc in query.order]
+
+        if lazy or (limit is not None and limit < len(rows)):
+            lazy_rows = LazySortedIndices(columns, descending, rows)
+            if limit is not None:
+                return lazy_rows[:limit]
+            if full:
+                # Ленивый порядок тоже переиспользуется: вычисленное начало не пропадает
+                self._orders[query.order] = lazy_rows
+            return lazy_rows
+
+        if full and len(self.table.shard_starts) > 1:
+            result = sort_sharded(columns, descending, self.table.shard_rows())
+        else:
+            result = sort_indices(columns, descending, rows)
+        if full:
+            self._orders[query.order] = result
+        return result[:limit] if limit is not None else result
+
+    def _sort_column(self, name: str) -> Sequence[int]:
+        if name in INT_COLUMNS:
+            return self.table.column(name)
+        # Строковое поле сортируется по рангу строки в пуле
+        codes, pool = self.table.string_column(name)
+        rank = [0] * len(pool)
+        for r, code in enumerate(sorted(range(len(pool)), key=pool.__getitem__)):
+            rank[code] = r
+        return [rank[c] for c in codes]
+
+    def rows(self, query: Query) -> Iterator[Apartment]:
+        return self.table.rows(self.run(query))
@@ -0,0 +1,230 @@
+"""
+Сервер запросов к базе квартир на asyncio.
+
+База загружается один раз (с кэшем, как в index.py) и держится в памяти;
+клиенты (query_client.py) подключаются по TCP или Unix-сокету и получают
+ответы JSON. Все соединения обслуживаются одним циклом событий: запросы
+отвечаются из готовых индексов, полная сортировка задачи 1 выполняется
+один раз и переиспользуется до перезагрузки базы.
+
+Протокол — по одной строке JSON (UTF-8) в каждую сторону, на одном
+соединении можно отправлять запросы один за другим:
+    запрос: {"id": 1, "query": "price 4000000 9000000", "limit": 50, "offset": 0}
+    ответ:  {"id": 1, "ok": true, "total": 123, "fields": [...], "rows": [[...], ...]}
+    ошибка: {"id": 1, "ok": false, "error": "..."}
+Запросы — как в пакетном режиме index.py: all | rooms N | price N1 N2, а также ping.
+
+С --watch сервер подхватывает изменения файла базы (reloader.py); на время
+применения изменений ответы задерживаются, но не видят данные наполовину.
+
+Запуск:
+    python query_server.py --data aprtment.json --listen 127.0.0.1:8765
+    python query_server.py --listen unix:/tmp/apartments.sock --watch 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import stat
+import sys
+from typing import Any, Sequence
+
+from apartment_index import ApartmentIndex
+from apartment_table import ApartmentTable
+from index import load_dataset, parse_query, report_reload
+from json_reader import VALIDATION_LEVELS
+from listing_export import RECORD_FIELDS, is_export_path, record_fields
+from query_client import DEFAULT_ADDRESS, parse_address
+from query_engine import PRESETS, QueryEngine
+from reloader import Reloader, file_signature
+
+MAX_REQUEST_BYTES = 1 << 20  # максимальная длина строки запроса
+
+
+class QueryService:
+    """Answers protocol requests over a loaded table and its indexes."""
+
+    __slots__ = ("table", "engine", "reloader")
+
+    def __init__(
+        self, table: ApartmentTable, apt_index: ApartmentIndex, reloader: Reloader | None = None
+    ) -> None:
+        self.table = table
+        # Движок хранит порядок задачи 1 до следующей перезагрузки базы
+        self.engine = QueryEngine(table, apt_index)
+        self.reloader = reloader
+
+    def answer(self, request: Any) -> dict[str, Any]:
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "запрос должен быть объектом JSON"}
+        response: dict[str, Any] = {"id": request.get("id")}
+
+        text = request.get("query")
+        if not isinstance(text, str) or not text.strip():
+            return {**response, "ok": False, "error": "не указан запрос (поле query)"}
+        if text.strip().lower() == "ping":
+            return {**response, "ok": True}
+
+        limit = request.get("limit")
+        offset = request.get("offset") or 0
+        for name, value in (("limit", limit), ("offset", offset)):
+            if value is not None and (type(value) is not int or value < 0):
+                return {**response, "ok": False, "error": f"{name} должен быть неотрицательным целым"}
+        try:
+            kind, args = parse_query(text)
+        except ValueError as e:
+            return {**response, "ok": False, "error": str(e)}
+
+        rows = self.engine.run(PRESETS[kind](*args))
+        end = None if limit is None else offset + limit
+        return {
+            **response,
+            "ok": True,
+            "total": len(rows),
+            "fields": RECORD_FIELDS,
+            "rows": [record_fields(a) for a in self.table.rows(rows[offset:end])],
+        }
+
+    def poll_reload(self) -> None:
+        # Интервал опроса задает _watch, поэтому файл проверяется напрямую, без poll()
+        if self.reloader is None or not self.reloader.watcher.changed():
+            return
+        result = self.reloader.reload()
+        if result.changed:
+            self.engine.invalidate()
+        report_reload(result, sys.stderr)
+
+
+def _encode(response: dict[str, Any]) -> bytes:
+    return json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+async def _handle_client(
+    service: QueryService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:  # строка длиннее MAX_REQUEST_BYTES
+                writer.write(_encode({"ok": False, "error": "слишком длинный запрос"}))
+                break
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"ok": False, "error": f"некорректный JSON: {e}"}
+            else:
+                try:
+                    response = service.answer(request)
+                except Exception as e:
+                    response = {"ok": False, "error": f"внутренняя ошибка сервера: {e}"}
+            writer.write(_encode(response))
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def _watch(service: QueryService, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        service.poll_reload()
+
+
+async def serve(service: QueryService, address: str = DEFAULT_ADDRESS) -> None:
+    """Serves requests on `address` (host:port or unix:/path) until cancelled."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await _handle_client(service, reader, writer)
+
+    target = parse_address(address)
+    if isinstance(target, str):
+        # Сокет, оставшийся от прошлого запуска, мешает bind
+        if os.path.exists(target) and stat.S_ISSOCK(os.stat(target).st_mode):
+            os.remove(target)
+        server = await asyncio.start_unix_server(handle, target, limit=MAX_REQUEST_BYTES)
+    else:
+        server = await asyncio.start_server(handle, *target, limit=MAX_REQUEST_BYTES)
+
+    # SIGTERM останавливает сервер так же, как Ctrl+C: сокет будет удален
+    task = asyncio.current_task()
+    if task is not None:
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: обработчики сигналов в цикле событий не поддерживаются
+
+    watcher = None
+    if service.reloader is not None:
+        watcher = asyncio.create_task(_watch(service, service.reloader.interval))
+    print(f"Сервер запросов слушает {address} (Ctrl+C — остановка)", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        if isinstance(target, str) and os.path.exists(target):
+            os.remove(target)
+
+
+def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Сервер запросов к базе квартир (JSON по сокету).")
+    parser.add_argument("--data", default="./aprtment.json", help="файл, каталог или шаблон файлов базы, выгрузка .aptcol / .csv")
+    parser.add_argument("--listen", default=DEFAULT_ADDRESS, help="host:port или unix:/путь/к/сокету")
+    parser.add_argument("--workers", type=int, default=None, help="процессов для проверки записей")
+    parser.add_argument(
+        "--validation", choices=VALIDATION_LEVELS, default="full", help="уровень проверки записей"
+    )
+    parser.add_argument(
+        "--watch",
+        type=float,
+        metavar="SECONDS",
+        default=None,
+        help="проверять изменения файла базы каждые SECONDS и применять их",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = _parse_args(argv)
+    try:
+        parse_address(args.listen)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    # Состояние файла до загрузки: изменение во время загрузки не потеряется
+    signature = file_signature(args.data) if args.watch is not None else None
+    table = load_dataset(args.data, args.workers, sys.stderr, args.validation)
+    if table is None:
+        return 1
+    apt_index = ApartmentIndex(table)
+    reloader = None
+    if args.watch is not None and (len(table.shard_starts) > 1 or is_export_path(args.data)):
+        print("⚠️  --watch поддерживается только для базы из одного файла JSON, слежение выключено.", file=sys.stderr)
+    elif args.watch is not None:
+        reloader = Reloader(table, apt_index, args.data, args.watch, args.workers, args.validation, signature)
+
+    try:
+        asyncio.run(serve(QueryService(table, apt_index, reloader), args.listen))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("\nСервер остановлен.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
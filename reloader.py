@@ -0,0 +1,241 @@
+"""
+Инкрементальная перезагрузка базы при изменении aprtment.json.
+
+FileWatcher опрашивает mtime и размер файла. Когда файл изменился,
+Reloader заново читает его потоком (iter_apartments) и сравнивает записи
+с таблицей по ключу адреса (улица, дом, квартира, номер повтора адреса);
+ключ собирается из кодов строк таблицы в одно целое число, а не хранится
+кортежем строк.
+В таблицу и индексы попадают только отличия:
+    новая запись      — append в таблицу, вставка в индексы через bisect;
+    измененная запись — удаление из индексов, перезапись строки, вставка;
+    пропавшая запись  — удаление из индексов, строка помечается удаленной.
+
+Изменения сначала собираются целиком и применяются только если файл
+дочитан без ошибки уровня файла: недописанный или битый файл не портит
+данные в памяти. Если изменилась большая часть базы, индексы
+перестраиваются целиком — это дешевле, чем тысячи вставок.
+
+Удаленные строки сначала только помечаются. Когда их набирается
+REBUILD_SHARE от всех строк таблицы, таблица сжимается на месте
+(ApartmentTable.compact): пропадают удаленные строки и строки пулов, на
+которые никто не ссылается, а индексы и ключи адресов строятся заново.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+
+import profiling
+from apartment_index import ApartmentIndex
+from apartment_table import ApartmentTable
+from json_reader import Apartment, collect_records, error_messages_limit, iter_apartments
+
+# Доля измененных строк, начиная с которой индексы строятся заново
+REBUILD_SHARE = 0.25
+
+_CODE_BITS = 32  # коды строк таблицы — array("I")
+_OCCURRENCE_MASK = (1 << _CODE_BITS) - 1
+
+
+def _address_key(street: int, house: int, apartment: int, n: int) -> int:
+    """Packs the codes of an address and its occurrence number into one int."""
+    return (((street << _CODE_BITS | house) << _CODE_BITS | apartment) << _CODE_BITS) | n
+
+
+@dataclass(slots=True, frozen=True)
+class ReloadResult:
+    added: int
+    updated: int
+    removed: int
+    invalid_count: int
+    error: str | None = None  # ошибка уровня файла: данные не изменены
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+
+def file_signature(path: str) -> tuple[int, int] | None:
+    """(st_mtime_ns, st_size) of the file, None if it cannot be stat-ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class FileWatcher:
+    """
+    Detects file changes by polling (st_mtime_ns, st_size).
+    signature — file_signature taken before the file was loaded: a change
+    made during the load is then reported by the first changed().
+    By default the current signature is taken.
+    """
+
+    __slots__ = ("path", "_signature")
+
+    def __init__(self, path: str, signature: tuple[int, int] | None = None) -> None:
+        self.path = path
+        self._signature = signature if signature is not None else file_signature(path)
+
+    def changed(self) -> bool:
+        """True once per change of the file since the previous call."""
+        signature = file_signature(self.path)
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+
+class Reloader:
+    """Keeps an ApartmentTable and its ApartmentIndex in sync with the source file."""
+
+    __slots__ = (
+        "table", "index", "watcher", "interval", "workers", "validation",
+        "invalid_count", "error_messages", "_rows_by_key", "_next_poll",
+    )
+
+    def __init__(
+        self,
+        table: ApartmentTable,
+        apt_index: ApartmentIndex,
+        json_path: str,
+        interval: float = 1.0,
+        workers: int | None = None,
+        validation: str = "full",
+        signature: tuple[int, int] | None = None,
+    ) -> None:
+        """signature — file_signature(json_path) taken before the table was loaded."""
+        self.table = table
+        self.index = apt_index
+        self.watcher = FileWatcher(json_path, signature)
+        self.interval = interval
+        self.workers = workers
+        self.validation = validation
+        self.invalid_count = 0
+        self.error_messages: list[str] = []
+        self._rows_by_key: dict[int, int] = {}
+        self._next_poll = time.monotonic() + interval
+
+        seen: dict[int, int] = {}
+        for i in table.live_rows():
+            address = self._row_key(i, 0)
+            n = seen.get(address, 0)
+            seen[address] = n + 1
+            self._rows_by_key[address | n] = i
+
+    def _row_key(self, i: int, n: int) -> int:
+        t = self.table
+        return _address_key(t.street_codes[i], t.house_codes[i], t.apartment_codes[i], n)
+
+    def poll(self) -> ReloadResult | None:
+        """
+        Проверяет файл не чаще раза в interval секунд.
+        Возвращает None, если файл не менялся, иначе — итог перезагрузки.
+        """
+        now = time.monotonic()
+        if now < self._next_poll:
+            return None
+        self._next_poll = now + self.interval
+        if not self.watcher.changed():
+            return None
+        return self.reload()
+
+    def reload(self) -> ReloadResult:
+        """Re-reads the file and applies the difference to the table and indexes."""
+        with profiling.stage("reload.diff"):
+            diff = self._diff()
+        if isinstance(diff, str):
+            return ReloadResult(0, 0, 0, self.invalid_count, diff)
+
+        added, updated, removed, invalid_count, error_messages = diff
+        with profiling.stage("reload.apply"):
+            self._apply(added, updated, removed)
+        self.invalid_count = invalid_count
+        self.error_messages = error_messages
+        profiling.count("reload.added", len(added))
+        profiling.count("reload.updated", len(updated))
+        profiling.count("reload.removed", len(removed))
+        return ReloadResult(len(added), len(updated), len(removed), invalid_count)
+
+    def _diff(
+        self,
+    ) -> tuple[list[tuple[int, Apartment]], list[tuple[int, Apartment]], list[int], int, list[str]] | str:
+        table = self.table
+        streets, numbers = table.streets, table.numbers
+        rows_by_key = self._rows_by_key
+        occurrences: dict[tuple[str, str, str], int] = {}
+        seen: set[int] = set()
+        added: list[tuple[int, Apartment]] = []  # (номер повтора адреса, запись)
+        updated: list[tuple[int, Apartment]] = []
+
+        def match(rec: Apartment) -> None:
+            address = (rec.address.street, rec.address.house, rec.address.apartment)
+            n = occurrences.get(address, 0)
+            occurrences[address] = n + 1
+            # Строки, которых нет в пулах таблицы, — заведомо новый адрес
+            codes = (streets.find(address[0]), numbers.find(address[1]), numbers.find(address[2]))
+            i = None if None in codes else rows_by_key.get(_address_key(*codes, n))
+            if i is None:
+                added.append((n, rec))
+            else:
+                seen.add(i)
+                if table.row(i) != rec:
+                    updated.append((i, rec))
+
+        records = iter_apartments(self.watcher.path, workers=self.workers, validation=self.validation)
+        collected = collect_records(records, match, error_messages_limit(self.validation))
+        if isinstance(collected, str):
+            return collected
+        invalid_count, error_messages = collected
+
+        removed = [key for key, i in rows_by_key.items() if i not in seen]
+        return added, updated, removed, invalid_count, error_messages
+
+    def _apply(
+        self,
+        added: list[tuple[int, Apartment]],
+        updated: list[tuple[int, Apartment]],
+        removed: list[int],
+    ) -> None:
+        table, apt_index, rows_by_key = self.table, self.index, self._rows_by_key
+        changes = len(added) + len(updated) + len(removed)
+        incremental = changes < REBUILD_SHARE * max(table.live_count(), 1)
+
+        for key in removed:
+            i = rows_by_key.pop(key)
+            if incremental:
+                apt_index.remove_row(i)
+            table.delete_row(i)
+        for i, rec in updated:
+            if incremental:
+                apt_index.remove_row(i)
+            table.set_row(i, rec)
+            if incremental:
+                apt_index.add_row(i)
+        for n, rec in added:
+            i = len(table)
+            table.append(rec)
+            rows_by_key[self._row_key(i, n)] = i
+            if incremental:
+                apt_index.add_row(i)
+
+        if table.deleted and len(table.deleted) >= REBUILD_SHARE * len(table):
+            self._compact()
+        elif changes and not incremental:
+            apt_index.rebuild()
+
+    def _compact(self) -> None:
+        """Drops deleted rows from the table; the index and address keys are rebuilt with it."""
+        remap = self.table.compact()
+        rows_by_key: dict[int, int] = {}
+        for key, i in self._rows_by_key.items():
+            i = remap[i]
+            rows_by_key[self._row_key(i, key & _OCCURRENCE_MASK)] = i
+        self._rows_by_key = rows_by_key
+        self.index.rebuild()
+        profiling.count("reload.compacted", len(remap) - len(self.table))
+
@@ -1,3 +1,42 @@
+"""
+Сортировки на месте и сортировка строк таблицы по составному ключу.
+
+Сортировки списка регистрируются в SORTS под именем (register_sort) и
+вызываются одинаково: fn(list, trace=None) сортирует список на месте и
+возвращает его. trace — необязательная функция trace(list, n), которую
+сортировка вызывает после каждого прохода (printSortedList печатает
+список, как раньше делала bubble_sort); без нее ничего не печатается.
+
+adaptive_sort выбирает сортировку по входу: короткие списки — вставками,
+уже упорядоченный или почти упорядоченный (несколько возрастающих серий)
+вход — слиянием серий за O(n) при одной серии, остальное — Шеллом.
+"""
+
+from __future__ import annotations
+
+import heapq
+from typing import Callable, Iterator, Sequence
+
+import profiling
+
+# Функция трассировки: вызывается после каждого прохода сортировки
+Trace = Callable[[list, int], None]
+# Зарегистрированные сортировки на месте: имя -> fn(list, trace=None) -> list
+SORTS: dict[str, Callable[..., list]] = {}
+
+
+def register_sort(name: str) -> Callable[[Callable[..., list]], Callable[..., list]]:
+    """Decorator: registers an in-place sort fn(list, trace=None) -> list in SORTS."""
+
+    def register(fn: Callable[..., list]) -> Callable[..., list]:
+        if name in SORTS:
+            raise ValueError(f"сортировка {name} уже зарегистрирована")
+        SORTS[name] = fn
+        return fn
+
+    return register
+
+
 def printSortedList(list: list, sortedCount: int) -> None:
     text = ""
     for index in range(len(list)):
@@ -12,36 +51,410 @@ def printSortedList(list: list, sortedCount: int) -> None:
     print(text)
 
 
-def bubble_sort(list: list) -> list:
-    count = 1
+@register_sort("bubble")
+def bubble_sort(list: list, trace: Trace | None = None) -> list:
+    """
+    Сортировка пузырьком на месте; останавливается после прохода без обменов.
+    trace(list, sortedCount) вызывается после каждого прохода: элементы
+    правее sortedCount уже на своих местах, 0 — список отсортирован
+    (trace=printSortedList печатает список, как раньше).
+    """
     sortedCount = len(list) - 1
-    while count != 0:
+    end = len(list) - 1
+    while True:
         count = 0
-        for index in range(len(list)):
-            if index < len(list) - 1:
-                if list[index] > list[index + 1]:
-                    list[index] += list[index + 1]
-                    list[index + 1] = list[index] - list[index + 1]
-                    list[index] = list[index] - list[index + 1]
-                    count += 1
+        for index in range(end):
+            if list[index] > list[index + 1]:
+                list[index], list[index + 1] = list[index + 1], list[index]
+                count += 1
+        # Наибольший элемент прохода всплыл в конец — дальше его не сравниваем
+        end -= 1
         if count != 0:
             sortedCount -= 1
         else:
             sortedCount = 0
-        printSortedList(list, sortedCount)
+        if trace is not None:
+            trace(list, sortedCount)
+        if count == 0:
+            return list
+
+
+@register_sort("insertion")
+def insertion_sort(list: list, trace: Trace | None = None) -> list:
+    """
+    Сортировка вставками на месте: O(n + число инверсий), лучшая для коротких
+    списков. trace(list, i) вызывается после вставки i-го элемента.
+    """
+    for i in range(1, len(list)):
+        value = list[i]
+        j = i
+        while j > 0 and list[j - 1] > value:
+            list[j] = list[j - 1]
+            j -= 1
+        list[j] = value
+        if trace is not None:
+            trace(list, i)
     return list
 
 
-def shell_sort(list: list[int]) -> list[int]:
-    last_index = len(list)
-    step = len(list) // 2
+# Последовательности шагов для сортировки Шелла (по возрастанию)
+_CIURA_GAPS = (1, 4, 10, 23, 57, 132, 301, 701, 1750)
+
+
+def _halving_gaps(n: int) -> list[int]:
+    """n/2, n/4, ..., 1 — исходная последовательность Шелла, O(n²) в худшем случае."""
+    gaps = []
+    step = n // 2
     while step > 0:
-        for i in range(step, last_index, 1):
-            j = i
-            delta = j - step
-            while delta >= 0 and list[delta] > list[j]:
-                list[delta], list[j] = list[j], list[delta]
-                j = delta
-                delta = j - step
+        gaps.append(step)
         step //= 2
+    return gaps
+
+
+def _ciura_gaps(n: int) -> list[int]:
+    """Эмпирическая последовательность Циура, дальше 1750 продолжается умножением на 2.25."""
+    gaps = [g for g in _CIURA_GAPS if g < n]
+    if gaps and gaps[-1] == _CIURA_GAPS[-1]:
+        g = _CIURA_GAPS[-1]
+        while True:
+            g = int(g * 2.25)
+            if g >= n:
+                break
+            gaps.append(g)
+    return gaps[::-1]
+
+
+def _tokuda_gaps(n: int) -> list[int]:
+    """Последовательность Токуды: h_k = ceil((9 * (9/4)^k - 4) / 5)."""
+    gaps = []
+    k = 0
+    while True:
+        g = -(-(9 * 9**k - 4 * 4**k) // (5 * 4**k))  # целочисленный ceil
+        if g >= n:
+            break
+        gaps.append(g)
+        k += 1
+    return gaps[::-1]
+
+
+GAP_SEQUENCES = {
+    "halving": _halving_gaps,
+    "ciura": _ciura_gaps,
+    "tokuda": _tokuda_gaps,
+}
+
+
+def shell_sort(list: list[int], gaps: str = "ciura", trace: Trace | None = None) -> list[int]:
+    """
+    Сортировка Шелла на месте.
+    gaps — последовательность шагов: "ciura" (по умолчанию), "tokuda" или "halving".
+    Вместо обменов элементы сдвигаются, вставляемый элемент записывается один раз.
+    trace(list, step) вызывается после прохода с каждым шагом.
+    """
+    if profiling.ENABLED:
+        return _shell_sort_counted(list, gaps, trace)
+    last_index = len(list)
+    for step in GAP_SEQUENCES[gaps](last_index):
+        for i in range(step, last_index):
+            value = list[i]
+            j = i
+            while j >= step and list[j - step] > value:
+                list[j] = list[j - step]
+                j -= step
+            list[j] = value
+        if trace is not None:
+            trace(list, step)
+    return list
+
+
+def _shell_sort_counted(list: list[int], gaps: str = "ciura", trace: Trace | None = None) -> list[int]:
+    """shell_sort with comparison / move counters (used when profiling is on)."""
+    comparisons = 0
+    moves = 0
+    last_index = len(list)
+    for step in GAP_SEQUENCES[gaps](last_index):
+        for i in range(step, last_index):
+            value = list[i]
+            j = i
+            while j >= step:
+                comparisons += 1
+                if not list[j - step] > value:
+                    break
+                list[j] = list[j - step]
+                moves += 1
+                j -= step
+            list[j] = value
+        if trace is not None:
+            trace(list, step)
+    profiling.count("sort.comparisons", comparisons)
+    profiling.count("sort.moves", moves)
+    return list
+
+
+def _register_shell(gaps: str) -> None:
+    @register_sort(f"shell:{gaps}")
+    def sort(list: list, trace: Trace | None = None) -> list:
+        return shell_sort(list, gaps, trace)
+
+
+for _gaps in GAP_SEQUENCES:
+    _register_shell(_gaps)
+
+
+@register_sort("builtin")
+def builtin_sort(list: list, trace: Trace | None = None) -> list:
+    """list.sort() (Timsort in C); trace(list, 0) is called once at the end."""
+    list.sort()
+    if trace is not None:
+        trace(list, 0)
+    return list
+
+
+def _run_starts(list: list, limit: int) -> list[int] | None:
+    """
+    Starts of the non-descending runs of the list, or None as soon as there
+    are more than `limit` of them; a single pass, O(n).
+    """
+    starts = [0]
+    for i in range(1, len(list)):
+        if list[i] < list[i - 1]:
+            if len(starts) == limit:
+                return None
+            starts.append(i)
+    return starts
+
+
+@register_sort("runs")
+def merge_runs(list: list, trace: Trace | None = None) -> list:
+    """
+    Слияние возрастающих серий: O(n log k) для k серий, O(n) для уже
+    отсортированного списка. Устойчива; трассировка — trace(list, k) в конце.
+    """
+    starts = _run_starts(list, len(list))
+    if len(starts) > 1:
+        bounds = starts + [len(list)]
+        runs = [list[a:b] for a, b in zip(bounds, bounds[1:])]
+        list[:] = heapq.merge(*runs)
+    if trace is not None:
+        trace(list, len(starts))
     return list
+
+
+INSERTION_MAX = 32  # до стольких элементов adaptive_sort сортирует вставками
+MERGE_RUNS_MAX = 16  # вход из не более чем стольких серий сливается, а не сортируется
+
+
+def choose_sort(list: list) -> str:
+    """
+    Name of the sort in SORTS that adaptive_sort uses for the list:
+    "insertion" for up to INSERTION_MAX items, "runs" for input made of at
+    most MERGE_RUNS_MAX non-descending runs (sorted or nearly sorted),
+    "shell:ciura" otherwise. The run check stops early on unsorted input.
+    """
+    if len(list) <= INSERTION_MAX:
+        return "insertion"
+    if _run_starts(list, MERGE_RUNS_MAX) is not None:
+        return "runs"
+    return "shell:ciura"
+
+
+@register_sort("adaptive")
+def adaptive_sort(list: list, trace: Trace | None = None) -> list:
+    """Sorts the list in place with the sort picked by choose_sort."""
+    name = choose_sort(list)
+    if profiling.ENABLED:
+        profiling.count(f"sort.adaptive.{name}")
+    return SORTS[name](list, trace)
+
+
+RADIX_BITS = 11  # бит на один проход поразрядной сортировки
+
+
+def radix_sort(keys: list[int]) -> list[int]:
+    """LSD radix sort of non-negative integers; returns a new list."""
+    if not keys:
+        return []
+    mask = (1 << RADIX_BITS) - 1
+    shift = 0
+    top = max(keys).bit_length()
+    while shift < top:
+        buckets: list[list[int]] = [[] for _ in range(mask + 1)]
+        for k in keys:
+            buckets[(k >> shift) & mask].append(k)
+        keys = [k for bucket in buckets for k in bucket]
+        shift += RADIX_BITS
+    return keys
+
+
+def pack_keys(
+    columns: Sequence[Sequence[int]],
+    descending: Sequence[bool],
+    indices: Sequence[int],
+) -> tuple[list[int], int]:
+    """
+    Packs a composite key into one non-negative int per row.
+
+    Each column takes (max - min).bit_length() bits; a descending column is
+    stored as (max - value), so mixed asc/desc keys need no negated tuples.
+    The position of the row in `indices` goes into the lowest bits: all keys
+    are unique and any sort over them is stable.
+    Returns (keys, position_bits).
+    """
+    m = len(indices)
+    keys = [0] * m
+    for col, desc in zip(columns, descending):
+        values = [col[i] for i in indices]
+        if not values:
+            break
+        lo = min(values)
+        hi = max(values)
+        width = (hi - lo).bit_length()
+        if desc:
+            keys = [(k << width) | (hi - v) for k, v in zip(keys, values)]
+        else:
+            keys = [(k << width) | (v - lo) for k, v in zip(keys, values)]
+    pos_bits = max(m - 1, 0).bit_length()
+    return [(k << pos_bits) | p for p, k in enumerate(keys)], pos_bits
+
+
+# Методы sort_indices помимо имен из SORTS: "shell" — shell_sort с
+# последовательностью шагов gaps, "radix" — radix_sort. SORTS проверяется при
+# вызове, поэтому сортировки, зарегистрированные позже, тоже доступны
+KEY_METHODS = ("shell", "radix")
+
+
+def sort_indices(
+    columns: Sequence[Sequence[int]],
+    descending: Sequence[bool],
+    indices: Sequence[int] | None = None,
+    method: str = "adaptive",
+    gaps: str = "ciura",
+) -> list[int]:
+    """
+    Stable argsort of row `indices` (all rows by default) by a composite key:
+    columns[0] first, then columns[1] and so on; descending[k] sets the
+    direction of columns[k].
+    method: "adaptive" — adaptive_sort (Shell unless the rows are few or
+    already nearly in order), "shell" — shell_sort with the given gap
+    sequence, "radix" — radix_sort, "builtin" — sorted() (Timsort in C),
+    or any other name from SORTS.
+    """
+    if method not in KEY_METHODS and method not in SORTS:
+        raise ValueError(f"неизвестный метод сортировки: {method}")
+    if indices is None:
+        indices = range(len(columns[0])) if columns else range(0)
+    with profiling.stage("sort.pack_keys"):
+        keys, pos_bits = pack_keys(columns, descending, indices)
+    with profiling.stage(f"sort.{method}"):
+        if method == "shell":
+            shell_sort(keys, gaps)
+        elif method == "radix":
+            keys = radix_sort(keys)
+        else:
+            SORTS[method](keys)
+    pos_mask = (1 << pos_bits) - 1
+    return [indices[k & pos_mask] for k in keys]
+
+
+def merge_sorted_runs(
+    columns: Sequence[Sequence[int]],
+    descending: Sequence[bool],
+    runs: Sequence[Sequence[int]],
+) -> list[int]:
+    """
+    K-way heap merge of row index runs, each already sorted by the key (as
+    by sort_indices). Equal keys keep the run order, so the result equals
+    the stable sort of the concatenated runs.
+    """
+    if len(runs) == 1:
+        return list(runs[0])
+    spec = list(zip(columns, descending))
+
+    def key(i: int) -> list[int]:
+        return [-col[i] if desc else col[i] for col, desc in spec]
+
+    return list(heapq.merge(*runs, key=key))
+
+
+def sort_sharded(
+    columns: Sequence[Sequence[int]],
+    descending: Sequence[bool],
+    shards: Sequence[Sequence[int]],
+    method: str = "adaptive",
+    gaps: str = "ciura",
+) -> list[int]:
+    """
+    sort_indices over the concatenation of `shards` without sorting it in one
+    pass: every shard is sorted on its own, then the runs are heap-merged.
+    """
+    runs = [sort_indices(columns, descending, rows, method, gaps) for rows in shards]
+    with profiling.stage("sort.merge"):
+        return merge_sorted_runs(columns, descending, runs)
+
+
+PAGE_BATCH = 256  # строк, вычисляемых за раз при итерации
+
+
+class LazySortedIndices:
+    """
+    Sorted order of row indices (same order as sort_indices) produced on demand.
+
+    Keys are packed and heapified once (O(n)); taking the first k rows costs
+    O(k log n) heap pops, so showing page 1 does not sort the whole input.
+    Supports len(), indexing, slicing and iteration like a list; only the
+    requested prefix is ever computed.
+    """
+
+    __slots__ = ("_indices", "_heap", "_pos_mask", "_done")
+
+    def __init__(
+        self,
+        columns: Sequence[Sequence[int]],
+        descending: Sequence[bool],
+        indices: Sequence[int] | None = None,
+    ) -> None:
+        if indices is None:
+            indices = range(len(columns[0])) if columns else range(0)
+        keys, pos_bits = pack_keys(columns, descending, indices)
+        heapq.heapify(keys)
+        self._indices = indices
+        self._heap = keys
+        self._pos_mask = (1 << pos_bits) - 1
+        self._done: list[int] = []
+
+    def _produce(self, count: int) -> None:
+        """Extends the computed prefix to at least `count` rows."""
+        heap = self._heap
+        done = self._done
+        indices = self._indices
+        pos_mask = self._pos_mask
+        while len(done) < count and heap:
+            done.append(indices[heapq.heappop(heap) & pos_mask])
+
+    def __len__(self) -> int:
+        return len(self._done) + len(self._heap)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            self._produce(stop if step > 0 else start + 1)
+        else:
+            if item < 0:
+                item += len(self)
+            self._produce(item + 1)
+        return self._done[item]
+
+    def __iter__(self) -> Iterator[int]:
+        i = 0
+        while True:
+            if i == len(self._done):
+                self._produce(i + PAGE_BATCH)
+                if i == len(self._done):
+                    return
+            yield self._done[i]
+            i += 1
+
+    def page(self, number: int, size: int) -> list[int]:
+        """Rows of page `number` (from 0) of `size` rows."""
+        return self[number * size:(number + 1) * size]
+
@@ -0,0 +1,34 @@
+"""Записи и файлы базы для тестов."""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any
+
+
+def record(apartment: int, street: str = "улица Ленина", **fields: Any) -> dict[str, Any]:
+    """Raw record of the "apartments" array; `fields` override the defaults."""
+    item: dict[str, Any] = {
+        "address": {"street": street, "house": "12", "apartment": str(apartment)},
+        "rooms": "2",
+        "total_area": "56 м²",
+        "living_area": "33 м²",
+        "floor": "4",
+        "total_floors": "9",
+        "owner_last_name": "Ильин",
+        "price": f"{6_000_000 + apartment * 1000} рублей",
+    }
+    item.update(fields)
+    return item
+
+
+def write_feed(path: Any, records: list[dict[str, Any]]) -> str:
+    """Writes the records as a listing file; keeps the mtime moving forward on rewrites."""
+    path = str(path)
+    old = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"apartments": records}, f, ensure_ascii=False, indent=1)
+    if old is not None and os.stat(path).st_mtime_ns <= old:
+        os.utime(path, ns=(old + 1_000_000, old + 1_000_000))
+    return path
@@ -0,0 +1,172 @@
+"""Потоковое чтение JSON(C): границы кусков, комментарии, ошибки уровня файла."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import json_reader
+from apartment_table import read_apartment_table
+from json_reader import collect_records, iter_apartments, read_apartments
+
+RECORD = """{
+      // запись с комментариями
+      "address": { "street": "улица Ленина", "house": "12", "apartment": "%d" },
+      "rooms": "2", "total_area": "56 м²", "living_area": "33 м²",
+      "floor": "4", "total_floors": "9", /* владелец */
+      "owner_last_name": "Ильин", "price": "6 700 000 рублей"
+    }"""
+
+
+def _listing(count: int = 5, head: str = "", tail: str = "") -> str:
+    records = ",\n    ".join(RECORD % n for n in range(1, count + 1))
+    return '{%s\n  "apartments": [\n    %s\n  ]%s\n}\n' % (head, records, tail)
+
+
+@pytest.fixture
+def write(tmp_path):
+    def write(text: str, name: str = "aprtment.json") -> str:
+        path = tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+
+    return write
+
+
+def _stream(path: str, chunk_size: int) -> tuple[list, int, list[str]]:
+    valid: list = []
+    collected = collect_records(iter_apartments(path, chunk_size=chunk_size), valid.append)
+    if isinstance(collected, str):
+        return [], 0, [collected]
+    return valid, *collected
+
+
+def test_chunk_boundaries_do_not_change_the_result(write):
+    path = write(_listing(head=' "meta": {"v": [1, -2.5e3, true, null]},', tail=', "n": 12345'))
+    expected = read_apartments(path)
+    assert len(expected[0]) == 5 and expected[1] == 0
+    for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+        assert _stream(path, chunk_size) == expected
+
+
+def test_comment_markers_inside_strings_are_kept(write):
+    record = RECORD.replace("улица Ленина", "ул. // не комментарий /* и это */")
+    path = write('{"apartments": [%s]}' % (record % 1))
+    for chunk_size in (1, 5, 1 << 16):
+        apartments, invalid, errors = _stream(path, chunk_size)
+        assert (invalid, errors) == (0, [])
+        assert apartments[0].address.street == "ул. // не комментарий /* и это */"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        _listing().rstrip()[:-1],  # нет закрывающей }
+        _listing()[: len(_listing()) // 2],  # файл обрезан посреди записи
+        _listing() + "garbage",
+        _listing(tail=', "y": tru'),
+        _listing(tail=', 5: 1'),
+        _listing(head=' "x": oops,'),
+        _listing(tail=', "z": "не закрыта'),
+    ],
+    ids=["no-brace", "truncated", "trailing", "bad-literal", "bad-key", "bad-value-before", "unterminated"],
+)
+def test_file_errors_are_all_or_nothing(write, text):
+    path = write(text)
+    with pytest.raises(ValueError):
+        json.loads(json_reader._strip_json_comments(text))
+    for chunk_size in (3, 1 << 16):
+        apartments, invalid, errors = _stream(path, chunk_size)
+        assert (apartments, invalid) == ([], 0)
+        assert len(errors) == 1 and errors[0].startswith("Ошибка парсинга JSON")
+    for options in ({}, {"stream": True}, {"mapped": True}):
+        apartments, invalid, errors = read_apartments(path, **options)
+        assert (apartments, invalid, len(errors)) == ([], 0, 1)
+    for mapped in (False, True):
+        table, invalid, errors = read_apartment_table(path, mapped=mapped)
+        assert (len(table), invalid, len(errors)) == (0, 0, 1)
+
+
+def test_trailing_comments_and_whitespace_are_allowed(write):
+    path = write(_listing() + "// конец\n/* файла */ \n")
+    for chunk_size in (2, 1 << 16):
+        apartments, invalid, errors = _stream(path, chunk_size)
+        assert (len(apartments), invalid, errors) == (5, 0, [])
+
+
+def test_mapped_reader_matches_stream(write):
+    text = _listing(head=' "meta": {"v": [1, "a//b"]},', tail=', "n": null') + "/* незакрытый"
+    path = write(text)
+    expected = _stream(path, 1 << 16)
+    assert len(expected[0]) == 5
+    assert read_apartments(path, mapped=True) == expected
+    assert read_apartments(path) == expected
+    table, invalid, errors = read_apartment_table(path, mapped=True)
+    assert (list(table.rows()), invalid, errors) == expected
+
+
+def test_mapped_reader_detects_rewrite_in_place(write):
+    path = write(_listing(50))
+    with json_reader.MappedListing(path) as listing:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"apartments": []}')
+        with pytest.raises(ValueError, match="изменился"):
+            listing.items(0, 50)
+
+
+def test_apartments_not_a_list(write):
+    path = write('{"apartments": {"a": 1}}')
+    expected = ([], 0, ["Ошибка: 'apartments' не является списком"])
+    assert read_apartments(path, stream=True) == expected
+    assert read_apartments(path) == expected
+
+
+def test_syntax_error_does_not_read_the_rest_of_the_file():
+    chunks = ['{"apartments": [{"rooms": oops}, ', *(['{"rooms": "1"}, '] * 1000), "{}]}"]
+    consumed = 0
+
+    def feed():
+        nonlocal consumed
+        for chunk in chunks:
+            consumed += 1
+            yield chunk
+
+    items = json_reader._iter_raw_items(json_reader._JsonStream(feed()))
+    with pytest.raises(json.JSONDecodeError):
+        list(items)
+    assert consumed < 10
+
+
+def test_record_errors_keep_their_numbers(write):
+    text = _listing(3).replace('"rooms": "2"', '"rooms": "много"', 1)
+    path = write(text)
+    apartments, invalid, errors = read_apartments(path, stream=True)
+    assert (len(apartments), invalid, len(errors)) == (2, 1, 1)
+    assert errors[0].startswith("Запись #1")
+
+
+@pytest.mark.parametrize("validation", ["full", "fast", "trusted"])
+def test_too_long_numbers_reject_only_their_record(write, validation):
+    text = _listing(3).replace('"6 700 000 рублей"', '"%s рублей"' % ("9" * 5000), 1)
+    path = write(text)
+    for options in ({}, {"stream": True}, {"mapped": True}):
+        apartments, invalid, errors = read_apartments(path, validation=validation, **options)
+        assert (len(apartments), invalid) == (2, 1)
+        assert "цена: значение слишком велико" in errors[0]
+
+
+def test_leading_zeros_do_not_count_as_digits():
+    assert json_reader._digits_to_int("0" * 40 + "42 м²") == 42
+    assert json_reader._digits_to_int_column(["0" * 40 + "42", "7"]) == [42, 7]
+
+
+@pytest.mark.parametrize("validation", ["full", "fast", "trusted"])
+def test_values_outside_int64_do_not_reach_the_table(write, validation):
+    text = _listing(3).replace('"6 700 000 рублей"', '"99999999999999999999 руб"', 1)
+    text = text.replace('"floor": "4"', '"floor": 9223372036854775808', 1)
+    path = write(text.replace('"6 700 000 рублей"', '"9223372036854775807 руб"', 1))
+    table, invalid, errors = read_apartment_table(path, validation=validation)
+    assert (len(table), invalid) == (2, 1)
+    assert "значение слишком велико" in errors[0]
+    assert max(table.price) == json_reader.MAX_FIELD_VALUE
@@ -0,0 +1,87 @@
+"""Двоичный кэш разобранных записей: попадание, пересборка, поврежденный файл."""
+
+from __future__ import annotations
+
+import pytest
+
+import listing_cache
+from apartment_table import read_apartment_table
+from feed import record, write_feed
+from listing_cache import cache_path_for, file_fingerprint, load_cached_table, read_cache
+
+
+def _rows(result):
+    table, invalid, errors = result
+    return list(table.rows()), invalid, errors
+
+
+@pytest.fixture
+def feed(tmp_path):
+    records = [record(n) for n in range(1, 6)]
+    records.append(record(6, rooms="много"))
+    return write_feed(tmp_path / "aprtment.json", records)
+
+
+@pytest.fixture
+def no_parse(monkeypatch):
+    """Makes any parse of the source fail: the result must come from the cache."""
+
+    def parse(*args, **kwargs):
+        raise AssertionError("файл разобран заново вместо чтения кэша")
+
+    monkeypatch.setattr(listing_cache, "read_apartment_table", parse)
+
+
+@pytest.mark.parametrize("validation", ["full", "fast", "trusted"])
+def test_cache_hit_returns_the_parsed_result(feed, request, validation):
+    expected = _rows(read_apartment_table(feed, validation=validation))
+    assert _rows(load_cached_table(feed, validation=validation)) == expected
+    request.getfixturevalue("no_parse")
+    assert _rows(load_cached_table(feed, validation=validation)) == expected
+
+
+def test_changed_source_rebuilds_the_cache(feed, tmp_path):
+    load_cached_table(feed)
+    records = [record(n) for n in range(1, 4)] + [record(9, price="100 рублей")]
+    write_feed(feed, records)
+    expected = _rows(read_apartment_table(feed))
+    assert len(expected[0]) == 4
+    assert _rows(load_cached_table(feed)) == expected
+    assert read_cache(cache_path_for(feed), file_fingerprint(feed)) is not None
+
+
+def _damage_truncate(data: bytes, table) -> bytes:
+    return data[: len(data) * 2 // 3]
+
+
+def _damage_garbage(data: bytes, table) -> bytes:
+    return data[:200] + b"\xff" * (len(data) - 200)
+
+
+def _damage_codes(data: bytes, table) -> bytes:
+    # Коды строк указывают за пределы пулов
+    codes = listing_cache.le_bytes(table.street_codes)
+    start = data.index(codes)
+    return data[:start] + b"\xff\xff\x00\x00" * len(table) + data[start + len(codes):]
+
+
+@pytest.mark.parametrize("damage", [_damage_truncate, _damage_garbage, _damage_codes])
+def test_damaged_cache_is_rebuilt(feed, damage):
+    table, _, _ = load_cached_table(feed)
+    expected = _rows(load_cached_table(feed))
+    cache = cache_path_for(feed)
+    with open(cache, "rb") as f:
+        data = f.read()
+    with open(cache, "wb") as f:
+        f.write(damage(data, table))
+    assert read_cache(cache, file_fingerprint(feed)) is None
+    assert _rows(load_cached_table(feed)) == expected
+    assert read_cache(cache, file_fingerprint(feed)) is not None
+
+
+def test_file_errors_are_not_cached(tmp_path):
+    path = tmp_path / "aprtment.json"
+    path.write_text('{"apartments": [', encoding="utf-8")
+    table, invalid, errors = load_cached_table(str(path))
+    assert (len(table), invalid, len(errors)) == (0, 0, 1)
+    assert not (tmp_path / "aprtment.json.aptcache").exists()
@@ -0,0 +1,90 @@
+"""Выгрузка .aptcol и .csv: обратное чтение и поврежденные файлы."""
+
+from __future__ import annotations
+
+import pytest
+
+import listing_export
+from apartment_table import read_apartment_table
+from feed import record, write_feed
+from json_reader import RecordError
+from listing_export import export_apartments, iter_export, read_export, read_export_table
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    # Маленькие блоки: выгрузка из нескольких блоков с общими словарями
+    monkeypatch.setattr(listing_export, "EXPORT_BLOCK_ROWS", 3)
+    records = [
+        record(n, street="улица Ленина" if n % 2 else 'проспект "Мира", 1-й', owner_last_name=f"Ильин{n % 4}")
+        for n in range(1, 11)
+    ]
+    table, _, _ = read_apartment_table(write_feed(tmp_path / "aprtment.json", records))
+    return list(table.rows())
+
+
+@pytest.fixture
+def aptcol(tmp_path, source):
+    path = str(tmp_path / "aprtment.aptcol")
+    export_apartments(source, path)
+    return path
+
+
+@pytest.mark.parametrize("suffix", [".aptcol", ".csv"])
+def test_round_trip_equals_source(tmp_path, source, suffix):
+    path = str(tmp_path / f"aprtment{suffix}")
+    assert export_apartments(source, path) == len(source)
+    assert read_export(path) == (source, 0, [])
+    assert list(iter_export(path)) == source
+
+
+def _rejected(path):
+    table, invalid_count, errors = read_export_table(path)
+    assert (len(table), invalid_count, len(errors)) == (0, 0, 1)
+    records = list(iter_export(path))
+    assert len(records) == 1 and isinstance(records[0], RecordError) and records[0].index == 0
+
+
+def test_truncated_columnar_file_is_rejected(aptcol):
+    with open(aptcol, "rb") as f:
+        data = f.read()
+    for size in range(len(data)):
+        with open(aptcol, "wb") as f:
+            f.write(data[:size])
+        _rejected(aptcol)
+
+
+def test_columnar_file_without_end_is_rejected(aptcol):
+    with open(aptcol, "rb") as f:
+        data = f.read()
+    with open(aptcol, "wb") as f:
+        f.write(data[:-listing_export._BLOCK_HEADER.size])
+    _rejected(aptcol)
+
+
+def test_columnar_row_count_is_checked(aptcol):
+    with open(aptcol, "rb") as f:
+        data = bytearray(f.read())
+    end = len(data) - listing_export._BLOCK_HEADER.size
+    data[end:] = listing_export._BLOCK_HEADER.pack(listing_export._END_TAG, 0, 11)
+    with open(aptcol, "wb") as f:
+        f.write(data)
+    _rejected(aptcol)
+
+
+def test_csv_checks_header_and_rows(tmp_path, source):
+    path = str(tmp_path / "aprtment.csv")
+    export_apartments(source, path)
+    with open(path, encoding="utf-8") as f:
+        header, *lines = f.read().splitlines()
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    _rejected(path)
+
+    # Оборванная последняя строка — некорректная запись, остальные читаются
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join([header, *lines[:-1], lines[-1][:10]]) + "\n")
+    table, invalid_count, errors = read_export_table(path)
+    assert list(table.rows()) == source[:-1]
+    assert invalid_count == 1 and errors[0].startswith("Запись #10:")
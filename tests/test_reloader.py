@@ -0,0 +1,132 @@
+"""Инкрементальная перезагрузка: таблица и индексы после правок файла."""
+
+from __future__ import annotations
+
+from apartment_index import ApartmentIndex
+from apartment_table import read_apartment_table
+from feed import record, write_feed
+from reloader import Reloader, file_signature
+
+
+def test_change_during_load_is_applied(tmp_path):
+    path = write_feed(tmp_path / "aprtment.json", [record(n) for n in range(1, 4)])
+    signature = file_signature(path)
+    table, _, _ = read_apartment_table(path)
+    # Файл заменен, пока шла загрузка: в памяти остались прежние данные
+    write_feed(path, [record(n) for n in range(1, 5)])
+    reloader = Reloader(table, ApartmentIndex(table), path, signature=signature)
+    assert reloader.watcher.changed()
+    result = reloader.reload()
+    assert (result.added, result.updated, result.removed) == (1, 0, 0)
+    assert table.live_count() == 4
+
+
+def _fresh(path):
+    table, invalid_count, _ = read_apartment_table(path)
+    return table, ApartmentIndex(table), invalid_count
+
+
+def assert_matches_file(reloader, path):
+    """Table and indexes of the reloader equal a fresh load of the file."""
+    table, apt_index, invalid_count = _fresh(path)
+    got = reloader.table
+    assert sorted(got.rows(), key=repr) == sorted(table.rows(), key=repr)
+    assert reloader.invalid_count == invalid_count
+    for rooms in range(0, 6):
+        assert list(got.rows(reloader.index.rooms(rooms))) == list(table.rows(apt_index.rooms(rooms)))
+    assert list(got.rows(reloader.index.ordered_by_price())) == list(table.rows(apt_index.ordered_by_price()))
+    assert list(got.rows(reloader.index.price_range(6_002_000, 6_006_000))) == list(
+        table.rows(apt_index.price_range(6_002_000, 6_006_000))
+    )
+
+
+def _watch(path):
+    table, _, _ = read_apartment_table(path)
+    return Reloader(table, ApartmentIndex(table), path)
+
+
+def test_deleted_rows_are_compacted(tmp_path):
+    records = [record(n, owner_last_name=f"Владелец{n}") for n in range(1, 9)]
+    path = write_feed(tmp_path / "aprtment.json", records)
+    reloader = _watch(path)
+    write_feed(path, records[3:])
+    assert reloader.reload().removed == 3
+
+    table = reloader.table
+    assert len(table) == 5 and not table.deleted
+    assert sorted(table.owners) == sorted(f"Владелец{n}" for n in range(4, 9))
+    assert_matches_file(reloader, path)
+
+    # Ключи адресов пересчитаны под новые номера строк и коды
+    records[5] = record(6, owner_last_name="Новиков")
+    write_feed(path, records[3:])
+    result = reloader.reload()
+    assert (result.added, result.updated, result.removed) == (0, 1, 0)
+    assert_matches_file(reloader, path)
+
+
+def _listing(count):
+    return [record(n, rooms=str(1 + n % 3), floor=str(1 + n % 7)) for n in range(1, count + 1)]
+
+
+def _reload(reloader, path, records):
+    write_feed(path, records)
+    result = reloader.reload()
+    assert result.error is None
+    assert_matches_file(reloader, path)
+    return result
+
+
+def test_incremental_edits_match_fresh_load(tmp_path):
+    records = _listing(20)
+    path = write_feed(tmp_path / "aprtment.json", records)
+    reloader = _watch(path)
+
+    # Меньше REBUILD_SHARE изменений — индексы правятся через add_row/remove_row
+    result = _reload(reloader, path, [*records, record(21, rooms="3", floor="2")])
+    assert (result.added, result.updated, result.removed) == (1, 0, 0)
+
+    records.append(record(21, rooms="3", floor="2"))
+    records[4] = record(5, rooms="1", price="6 001 000 рублей")
+    result = _reload(reloader, path, records)
+    assert (result.added, result.updated, result.removed) == (0, 1, 0)
+
+    del records[10]
+    result = _reload(reloader, path, records)
+    assert (result.added, result.updated, result.removed) == (0, 0, 1)
+
+
+def test_duplicate_addresses_match_fresh_load(tmp_path):
+    records = _listing(20)
+    path = write_feed(tmp_path / "aprtment.json", records)
+    reloader = _watch(path)
+
+    # Второй и третий экземпляры одного адреса — отдельные строки
+    copies = [record(7, rooms="4", price=f"{6_100_000 + k} рублей") for k in range(2)]
+    result = _reload(reloader, path, [*records, *copies])
+    assert (result.added, result.updated, result.removed) == (2, 0, 0)
+
+    # Пропал первый экземпляр: повторы сдвигаются на его место
+    rest = [r for r in records if r["address"]["apartment"] != "7"]
+    _reload(reloader, path, [*rest, *copies])
+    _reload(reloader, path, [*rest, copies[0]])
+
+
+def test_large_change_rebuilds_indexes(tmp_path):
+    records = _listing(8)
+    path = write_feed(tmp_path / "aprtment.json", records)
+    reloader = _watch(path)
+    changed = [record(n, rooms="1", price=f"{7_000_000 - n} рублей") for n in range(1, 9)]
+    result = _reload(reloader, path, [*changed, *_listing(12)[8:]])
+    assert (result.added, result.updated, result.removed) == (4, 8, 0)
+
+
+def test_broken_file_keeps_data(tmp_path):
+    records = _listing(5)
+    path = write_feed(tmp_path / "aprtment.json", records)
+    reloader = _watch(path)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"apartments": [')
+    assert reloader.reload().error is not None
+    write_feed(tmp_path / "fresh.json", records)
+    assert_matches_file(reloader, str(tmp_path / "fresh.json"))
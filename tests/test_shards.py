@@ -0,0 +1,33 @@
+"""Базы из нескольких файлов: шаблоны и каталоги вместе с кэшами шардов."""
+
+from __future__ import annotations
+
+from json_reader import shard_paths
+from listing_cache import load_cached_table
+
+RECORD = (
+    '{"address": {"street": "улица Ленина", "house": "12", "apartment": "%d"}, "rooms": "2",'
+    ' "total_area": "56 м²", "living_area": "33 м²", "floor": "4", "total_floors": "9",'
+    ' "owner_last_name": "Ильин", "price": "6 700 000 рублей"}'
+)
+
+
+def _write_shards(tmp_path) -> None:
+    for name, numbers in (("a.json", (1, 2)), ("b.json", (3,))):
+        records = ", ".join(RECORD % n for n in numbers)
+        (tmp_path / name).write_text('{"apartments": [%s]}' % records, encoding="utf-8")
+
+
+def test_glob_loaded_twice_ignores_shard_caches(tmp_path):
+    _write_shards(tmp_path)
+    source = str(tmp_path / "*")
+    for validation in ("full", "fast"):
+        first = load_cached_table(source, validation=validation)
+        # Второй запуск видит кэши *.aptcache рядом с шардами
+        second = load_cached_table(source, validation=validation)
+        for table, invalid, errors in (first, second):
+            assert (len(table), invalid, errors) == (3, 0, [])
+            assert len(table.shard_starts) == 2
+    (tmp_path / "a.json.123.tmp").write_text("{", encoding="utf-8")
+    assert [p.rsplit("/", 1)[-1] for p in shard_paths(source)] == ["a.json", "b.json"]
+    assert shard_paths(str(tmp_path)) == shard_paths(source)
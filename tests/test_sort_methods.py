@@ -0,0 +1,74 @@
+"""Реестр сортировок и выбор сортировки по входу."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+import sort_methods
+from sort_methods import SORTS, choose_sort, register_sort, sort_indices
+
+
+@pytest.fixture
+def registry():
+    saved = dict(SORTS)
+    yield SORTS
+    SORTS.clear()
+    SORTS.update(saved)
+
+
+def test_sort_registered_later_is_usable_by_sort_indices(registry):
+    calls = []
+
+    @register_sort("test-selection")
+    def selection_sort(items: list, trace=None) -> list:
+        calls.append(len(items))
+        for i in range(len(items)):
+            j = min(range(i, len(items)), key=items.__getitem__)
+            items[i], items[j] = items[j], items[i]
+        return items
+
+    rooms = [3, 1, 2, 3, 1]
+    price = [5, 9, 1, 2, 9]
+    result = sort_indices([rooms, price], [True, False], method="test-selection")
+    assert calls == [5]
+    assert result == sorted(range(5), key=lambda i: (-rooms[i], price[i]))
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        sort_indices([[1, 2]], [False], method="нет такой")
+
+
+def test_duplicate_registration_is_rejected(registry):
+    with pytest.raises(ValueError):
+        register_sort("insertion")(sort_methods.insertion_sort)
+
+
+@pytest.mark.parametrize("name", sorted(SORTS))
+def test_registered_sorts_sort_in_place(name):
+    rnd = random.Random(7)
+    for data in ([], [1], [2, 1], list(range(50)), list(range(50, 0, -1)),
+                 [rnd.randint(0, 20) for _ in range(200)]):
+        items = data[:]
+        assert SORTS[name](items) is items
+        assert items == sorted(data)
+
+
+def test_choose_sort_by_size_and_presortedness():
+    rnd = random.Random(3)
+    nearly = list(range(1000))
+    nearly[10], nearly[900] = nearly[900], nearly[10]
+    assert choose_sort(list(range(10, 0, -1))) == "insertion"
+    assert choose_sort(list(range(1000))) == "runs"
+    assert choose_sort(nearly) == "runs"
+    assert choose_sort([rnd.random() for _ in range(1000)]) == "shell:ciura"
+
+
+def test_trace_is_called_only_when_given(capsys):
+    passes = []
+    assert sort_methods.bubble_sort([3, 1, 2]) == [1, 2, 3]
+    assert capsys.readouterr().out == ""
+    sort_methods.bubble_sort([3, 1, 2], trace=lambda items, n: passes.append((items[:], n)))
+    assert passes == [([1, 2, 3], 1), ([1, 2, 3], 0)]